@@ -1,11 +1,12 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.db.models import Avg, Count, Sum
+from django.db.models import Avg, Q, Sum
 from django.contrib.auth import login
 
 from .forms import RegistrationForm, ProfileForm
 from catalog.models import Artwork, Comment
+from catalog.sketches import unique_viewers_many
 
 
 def register(request):
@@ -32,18 +33,19 @@ def dashboard(request):
     """
 
     # === 1) Foydalanuvchiga tegishli e’lonlar (optimizatsiya bilan) ===
+    # views_count / avg_rating / comments_count — Artwork ustunlari
     arts = (
         Artwork.objects.filter(author=request.user)
-        .annotate(
-            views_count=Count('views'),             # Ko‘rishlar
-            avg_rating=Avg('ratings__value'),       # O‘rtacha reyting
-            comments_count=Count('comments')        # Izohlar
-        )
         .select_related('category')
         .prefetch_related('images')
         .order_by('-created')
     )
 
+    # Oxirgi 7 kundagi noyob ko‘ruvchilar (HyperLogLog bahosi, bitta kesh so‘rovi)
+    unique_7d = unique_viewers_many([a.pk for a in arts], 7)
+    for a in arts:
+        a.unique_viewers_7d = unique_7d[a.pk]
+
     # === 2) Izohlar (oxirgi 20 ta) ===
     comments = (
         Comment.objects.filter(artwork__author=request.user)
@@ -57,7 +59,7 @@ def dashboard(request):
     total_views = arts.aggregate(total=Sum('views_count'))['total'] or 0
 
     # Barcha reytinglar bo‘yicha umumiy o‘rtacha
-    avg_rating = arts.aggregate(avg=Avg('avg_rating'))['avg'] or 0
+    avg_rating = arts.aggregate(avg=Avg('avg_rating', filter=Q(rating_count__gt=0)))['avg'] or 0
 
     # DISTINCT kategoriyalar soni
     total_categories = arts.values('category').distinct().count()
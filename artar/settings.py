@@ -145,6 +145,39 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache: default in-process; set CACHE_BACKEND/CACHE_LOCATION for a shared
+# cache (e.g. django.core.cache.backends.redis.RedisCache) across workers
+CACHES = {
+    'default': {
+        'BACKEND': get_env('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': get_env('CACHE_LOCATION', 'artar-default'),
+    }
+}
+
+# Home listing: cached result counts, capped at an estimate on large sets
+CATALOG_COUNT_CACHE_TIMEOUT = int(get_env('CATALOG_COUNT_CACHE_TIMEOUT', '300'))
+CATALOG_COUNT_ESTIMATE_THRESHOLD = int(get_env('CATALOG_COUNT_ESTIMATE_THRESHOLD', '1000'))
+# Rendered home pages for anonymous visitors (invalidated by catalog generation)
+CATALOG_PAGE_CACHE_TIMEOUT = int(get_env('CATALOG_PAGE_CACHE_TIMEOUT', '120'))
+# Sidebar facets: price bucket boundaries (so'm) and cache lifetime
+CATALOG_PRICE_BUCKETS = [0, 100000, 500000, 1000000, 5000000]
+CATALOG_FACET_CACHE_TIMEOUT = int(get_env('CATALOG_FACET_CACHE_TIMEOUT', '300'))
+# Per-card template fragments, keyed on pk/updated/counters
+CATALOG_CARD_CACHE_TIMEOUT = int(get_env('CATALOG_CARD_CACHE_TIMEOUT', '600'))
+# Rendered detail pages for anonymous visitors (invalidated by per-artwork version;
+# views_count on a cached page may lag by up to this many seconds)
+CATALOG_DETAIL_CACHE_TIMEOUT = int(get_env('CATALOG_DETAIL_CACHE_TIMEOUT', '60'))
+# ArtworkView logging: buffered in-process, flushed by a background thread
+# (and at exit once that thread runs; tests turn it off, so nothing is flushed on exit)
+CATALOG_VIEW_BUFFER_SIZE = int(get_env('CATALOG_VIEW_BUFFER_SIZE', '200'))
+CATALOG_VIEW_BUFFER_INTERVAL = float(get_env('CATALOG_VIEW_BUFFER_INTERVAL', '5'))
+CATALOG_VIEW_BUFFER_BACKGROUND = get_env('CATALOG_VIEW_BUFFER_BACKGROUND', '1') == '1'
+CATALOG_VIEW_SKETCH_DAYS = int(get_env('CATALOG_VIEW_SKETCH_DAYS', '30'))
+CATALOG_VIEW_BLOOM_CAPACITY = int(get_env('CATALOG_VIEW_BLOOM_CAPACITY', '100000'))
+CATALOG_VIEW_BLOOM_ERROR = float(get_env('CATALOG_VIEW_BLOOM_ERROR', '0.01'))
+CATALOG_BACKGROUND_WORKERS = int(get_env('CATALOG_BACKGROUND_WORKERS', '2'))
+CATALOG_BACKGROUND_TASKS = get_env('CATALOG_BACKGROUND_TASKS', '1') == '1'
+
 # Auth
 LOGIN_REDIRECT_URL = 'accounts:dashboard'
 LOGOUT_REDIRECT_URL = 'catalog:home'
@@ -190,12 +223,46 @@ LOGGING = {
     },
 }
 
+# Outbound HTTP (OpenAI, Telegram): per-host keep-alive pool, catalog.httpclient
+HTTP_TIMEOUT = float(get_env('HTTP_TIMEOUT', '10'))
+HTTP_POOL_SIZE = int(get_env('HTTP_POOL_SIZE', '4'))
+HTTP_MAX_RESPONSE_BYTES = int(get_env('HTTP_MAX_RESPONSE_BYTES', str(2 * 1024 * 1024)))
+
 # Telegram bot config (used for order notifications)
 TELEGRAM_BOT_TOKEN = get_env('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = get_env('TELEGRAM_CHAT_ID', '')
+# Lokal stand-in server uchun almashtiriladi (python manage.py run_api_standin)
+TELEGRAM_API_BASE = get_env('TELEGRAM_API_BASE', 'https://api.telegram.org')
+TELEGRAM_TIMEOUT = float(get_env('TELEGRAM_TIMEOUT', '6'))
+# Outbox: fon oqimi yuboradi; qayta urinishlar eksponensial kechikish bilan.
+# Qayta ishga tushirishdan qolgan xabarlar uchun `send_telegram_outbox --loop` (Procfile worker) kerak
+TELEGRAM_OUTBOX_BACKGROUND = get_env('TELEGRAM_OUTBOX_BACKGROUND', '1') == '1'
+TELEGRAM_OUTBOX_POLL = float(get_env('TELEGRAM_OUTBOX_POLL', '5'))
+TELEGRAM_OUTBOX_MAX_ATTEMPTS = int(get_env('TELEGRAM_OUTBOX_MAX_ATTEMPTS', '8'))
+TELEGRAM_OUTBOX_BACKOFF = float(get_env('TELEGRAM_OUTBOX_BACKOFF', '5'))
+TELEGRAM_OUTBOX_MAX_BACKOFF = float(get_env('TELEGRAM_OUTBOX_MAX_BACKOFF', '3600'))
+# Bitta chatga xabarlar orasidagi minimal oraliq (Telegram: ~1 xabar/soniya)
+TELEGRAM_CHAT_MIN_INTERVAL = float(get_env('TELEGRAM_CHAT_MIN_INTERVAL', '1'))
 
 # OpenAI moderation
 OPENAI_API_KEY = get_env('OPENAI_API_KEY', '')
+OPENAI_API_BASE = get_env('OPENAI_API_BASE', 'https://api.openai.com/v1')
 MODERATION_ENABLED = bool(OPENAI_API_KEY)
 MODERATION_THRESHOLD = float(get_env('MODERATION_THRESHOLD', '0.2'))
 MODERATION_DUP_THRESHOLD = float(get_env('MODERATION_DUP_THRESHOLD', '0.9'))
+# Trigramma indeksidan SequenceMatcher bilan tekshiriladigan nomzodlar soni
+MODERATION_DUP_CANDIDATES = int(get_env('MODERATION_DUP_CANDIDATES', '50'))
+# dHash bo‘yicha dublikat rasm: Hamming masofasi (64 bitdan) shu qiymatdan oshmasa
+PHASH_DUP_DISTANCE = int(get_env('PHASH_DUP_DISTANCE', '6'))
+# Matn va rasm tekshiruvlari parallel; umumiy muddat (soniya) o‘tsa kontent o‘tkaziladi
+MODERATION_DEADLINE = float(get_env('MODERATION_DEADLINE', '12'))
+MODERATION_WORKERS = int(get_env('MODERATION_WORKERS', '8'))
+# Oldindan hisoblanadigan AI tahlili tillari (bo‘sh bo‘lsa — LANGUAGES)
+AI_ANALYSIS_LANGUAGES = [c for c in get_env('AI_ANALYSIS_LANGUAGES', '').split(',') if c.strip()]
+AI_ANALYSIS_RETRY_AFTER = int(get_env('AI_ANALYSIS_RETRY_AFTER', '3600'))
+# E’lon va rasmlarining ketma-ket saqlanishi bitta tahlilga birlashadi (soniya)
+AI_ANALYSIS_DEBOUNCE = float(get_env('AI_ANALYSIS_DEBOUNCE', '3'))
+# analyze_content natijalari keshi (kontent xeshi bo‘yicha)
+AI_CACHE_TTL = int(get_env('AI_CACHE_TTL', '86400'))
+AI_CACHE_NEGATIVE_TTL = int(get_env('AI_CACHE_NEGATIVE_TTL', '60'))
+AI_CACHE_MAX_ENTRIES = int(get_env('AI_CACHE_MAX_ENTRIES', '512'))
@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Artwork, ArtworkImage, Rating, Comment, Category
+from django.conf import settings
+from django.utils import timezone
+
+from .imagehash import similar_images
+from .models import (
+    Artwork, ArtworkAnalysis, ArtworkImage, Rating, Comment, Category, ModerationVerdict, TelegramOutbox,
+)
 
 
 class ArtworkImageInline(admin.TabularInline):
@@ -14,6 +20,24 @@ class ArtworkAdmin(admin.ModelAdmin):
     search_fields = ('title', 'author__username')
     prepopulated_fields = {"slug": ("title",)}
     inlines = [ArtworkImageInline]
+    actions = ['report_duplicate_images']
+
+    @admin.action(description='Dublikat rasmlarni topish')
+    def report_duplicate_images(self, request, queryset):
+        found = 0
+        for art in queryset.prefetch_related('images'):
+            hashes = [art.phash] + [img.phash for img in art.images.all()]
+            others = {
+                ref.artwork_id
+                for h in hashes if h
+                for _, ref in similar_images(h, settings.PHASH_DUP_DISTANCE, exclude_artwork=art.pk)
+            }
+            if others:
+                found += 1
+                titles = ', '.join(Artwork.objects.filter(pk__in=others).values_list('title', flat=True))
+                self.message_user(request, f'"{art.title}" rasmlari o‘xshash: {titles}', level='warning')
+        if not found:
+            self.message_user(request, 'Dublikat rasmlar topilmadi.')
 
 
 @admin.register(Category)
@@ -36,3 +60,33 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('created',)
     search_fields = ('artwork__title', 'user__username', 'text')
 
+
+@admin.register(ArtworkAnalysis)
+class ArtworkAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('artwork', 'lang', 'status', 'updated')
+    list_filter = ('status', 'lang')
+    search_fields = ('artwork__title',)
+    raw_id_fields = ('artwork',)
+
+
+@admin.register(TelegramOutbox)
+class TelegramOutboxAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'created', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('text', 'last_error')
+    readonly_fields = ('created', 'sent_at', 'last_error')
+    actions = ['retry_now']
+
+    @admin.action(description='Hozir qayta yuborish')
+    def retry_now(self, request, queryset):
+        n = queryset.exclude(status=TelegramOutbox.Status.SENT).update(
+            status=TelegramOutbox.Status.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{n} ta xabar navbatga qaytarildi.')
+
+
+@admin.register(ModerationVerdict)
+class ModerationVerdictAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'digest', 'version', 'flagged', 'score', 'created')
+    list_filter = ('kind', 'flagged', 'version')
+    search_fields = ('digest',)
@@ -1,14 +1,69 @@
 import base64
+import hashlib
 import json
 import logging
-import urllib.request
-import urllib.error
-from typing import Iterable, Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Dict, Any, Optional
 
 from django.conf import settings
 
+from .httpclient import HTTPStatusError, openai_url, post_json
+
 logger = logging.getLogger(__name__)
 
+# Prompt yoki model o‘zgarsa oshiriladi — eski kesh yozuvlari ishlatilmaydi
+PROMPT_VERSION = "gpt-4o-mini:v1"
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and a fixed maximum size."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+analysis_cache = TTLCache(getattr(settings, "AI_CACHE_MAX_ENTRIES", 512))
+
+
+def analysis_cache_key(title: str, description: str, images: Iterable[bytes], target_lang: str) -> str:
+    h = hashlib.sha256()
+    for part in (PROMPT_VERSION, target_lang, title or "", description or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    for img in images:
+        h.update(hashlib.sha256(img).digest())
+    return h.hexdigest()
+
 
 def _build_image_parts(images: Iterable[bytes]) -> list:
     parts = []
@@ -28,10 +83,27 @@ def analyze_content(title: str, description: str, images: Iterable[bytes], targe
     Use OpenAI to auto-suggest tags, style, category, title/description/hashtags.
     Returns a dict with possible keys: title, description, tags, hashtags, style, category, summary.
     If API key is missing or request fails, returns {}.
+
+    Results are cached by a content hash (see analysis_cache_key) for AI_CACHE_TTL
+    seconds; empty results only for AI_CACHE_NEGATIVE_TTL so an outage is not retried
+    on every call.
     """
     if not settings.OPENAI_API_KEY:
         return {}
 
+    images = list(images)
+    key = analysis_cache_key(title, description, images, target_lang)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    result = _request_analysis(title, description, images, target_lang)
+    ttl = getattr(settings, "AI_CACHE_TTL", 86400) if result else getattr(settings, "AI_CACHE_NEGATIVE_TTL", 60)
+    analysis_cache.set(key, result, ttl)
+    return dict(result)
+
+
+def _request_analysis(title: str, description: str, images: list, target_lang: str) -> Dict[str, Any]:
     sys_prompt = (
         "You are a concise content analyzer for an art marketplace. "
         f"Answer in language code '{target_lang}'. "
@@ -59,22 +131,16 @@ def analyze_content(title: str, description: str, images: Iterable[bytes], targe
         "response_format": {"type": "json_object"},
     }
 
-    req = urllib.request.Request(
-        "https://api.openai.com/v1/chat/completions",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        },
-        method="POST",
-    )
-
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            content = data["choices"][0]["message"]["content"]
-            return json.loads(content)
-    except urllib.error.HTTPError as exc:
+        data = post_json(
+            openai_url("chat/completions"),
+            payload,
+            headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+            timeout=15,
+        )
+        content = data["choices"][0]["message"]["content"]
+        return json.loads(content)
+    except HTTPStatusError as exc:
         # Gracefully degrade on rate limits or other HTTP errors
         logger.warning("AI content analysis HTTPError %s: %s", getattr(exc, "code", None), exc)
         return {}
@@ -0,0 +1,125 @@
+"""Persisted AI analysis for the detail page.
+
+`analyze_content` is never called from `art_detail`. Analyses are generated
+in the background (catalog.background) when an artwork or its images change,
+for every code in AI_ANALYSIS_LANGUAGES, and stored in `ArtworkAnalysis`.
+Jobs are debounced per artwork and language (AI_ANALYSIS_DEBOUNCE), and a
+result is dropped if the artwork or its images changed while it ran.
+The detail page reads them back as subquery annotations on the artwork
+fetch (`analysis_annotations`); a missing language is scheduled on first
+request and shown once it is ready. Only configured languages are ever
+generated: any other `?lang=` falls back to the default (`analysis_lang`).
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import JSONField, OuterRef, Subquery
+from django.utils import timezone
+
+from . import background
+from .ai_content import analyze_content
+from .models import Artwork, ArtworkAnalysis, ArtworkImage
+
+logger = logging.getLogger(__name__)
+
+def normalize_lang(lang: str) -> str:
+    return (lang or '').strip().lower().replace('_', '-')
+
+
+def analysis_languages() -> list:
+    codes = getattr(settings, 'AI_ANALYSIS_LANGUAGES', None) or [code for code, _ in settings.LANGUAGES]
+    return [normalize_lang(code) for code in codes]
+
+
+def analysis_lang(lang: str) -> str:
+    """`lang` if analyses are generated for it, otherwise the default language."""
+    langs = analysis_languages()
+    lang = normalize_lang(lang)
+    if lang in langs:
+        return lang
+    default = normalize_lang(settings.LANGUAGE_CODE)
+    return default if default in langs or not langs else langs[0]
+
+
+def _read_file(file_field):
+    try:
+        with file_field.open('rb') as fp:
+            return fp.read()
+    except Exception:
+        return None
+
+
+def artwork_images(art, limit: int = 3) -> list:
+    """Bytes of the main image plus the first gallery images (at most `limit`)."""
+    fields = [art.image] if art.image else []
+    fields += [img.image for img in art.images.all()[:2] if img.image]
+    images = []
+    for field in fields[:limit]:
+        data = _read_file(field)
+        if data:
+            images.append(data)
+    return images
+
+
+def _content_state(artwork_id: int):
+    """What an analysis is computed from: title, description and the image files."""
+    fields = Artwork.objects.filter(pk=artwork_id).values_list('title', 'description', 'image').first()
+    if fields is None:
+        return None
+    return fields, list(ArtworkImage.objects.filter(artwork_id=artwork_id).order_by('pk').values_list('pk', 'image'))
+
+
+def generate_analysis(artwork_id: int, lang: str) -> None:
+    state = _content_state(artwork_id)
+    art = Artwork.objects.filter(pk=artwork_id).prefetch_related('images').first()
+    if art is None:
+        return
+    data = analyze_content(art.title or '', art.description or '', artwork_images(art), target_lang=lang) or {}
+    # So‘rov davomida e’lon yoki rasmlari o‘zgargan — natija eskirgan, yangi vazifa allaqachon rejalashtirilgan
+    if _content_state(artwork_id) != state:
+        logger.info("Artwork %s changed during analysis; dropping the %s result", artwork_id, lang)
+        return
+    ArtworkAnalysis.objects.update_or_create(
+        artwork_id=artwork_id,
+        lang=lang,
+        defaults={
+            'data': data,
+            'status': ArtworkAnalysis.Status.READY if data else ArtworkAnalysis.Status.FAILED,
+        },
+    )
+
+
+def schedule_analysis(artwork_id: int, langs=None) -> None:
+    if not settings.OPENAI_API_KEY:
+        return
+    for lang in langs or analysis_languages():
+        background.submit(
+            generate_analysis, artwork_id, lang, key=('analysis', artwork_id, lang),
+            delay=getattr(settings, 'AI_ANALYSIS_DEBOUNCE', 3),
+        )
+
+
+def analysis_annotations(lang: str) -> dict:
+    """Subquery annotations exposing the (artwork, lang) analysis row on an Artwork queryset."""
+    rows = ArtworkAnalysis.objects.filter(artwork=OuterRef('pk'), lang=normalize_lang(lang))
+    return {
+        'analysis_status': Subquery(rows.values('status')[:1]),
+        'analysis_data': Subquery(rows.values('data')[:1], output_field=JSONField()),
+        'analysis_updated': Subquery(rows.values('updated')[:1]),
+    }
+
+
+def annotated_analysis(art, lang: str) -> dict:
+    """Ready analysis from `analysis_annotations` or {}; schedules generation when missing or failed long enough ago."""
+    lang = normalize_lang(lang)
+    if art.analysis_status == ArtworkAnalysis.Status.READY:
+        return art.analysis_data or {}
+    # Faqat sozlangan tillar — aks holda har xil ?lang= pullik so‘rovlar boshlardi
+    if settings.OPENAI_API_KEY and lang in analysis_languages():
+        retry_after = timedelta(seconds=getattr(settings, 'AI_ANALYSIS_RETRY_AFTER', 3600))
+        if art.analysis_status is None or art.analysis_updated < timezone.now() - retry_after:
+            schedule_analysis(art.pk, [lang])
+    return {}
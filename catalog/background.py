@@ -0,0 +1,70 @@
+"""Small in-process task runner for work that must stay off the request path.
+
+Tasks run on a shared ThreadPoolExecutor (CATALOG_BACKGROUND_WORKERS threads).
+A task submitted with a `key` is queued at most once until it starts, so a
+burst of saves for the same object collapses into one run; a `delay` keeps
+the task queued that long first (debounce), so saves spread over a request
+(an artwork, then its images one by one) still collapse. With
+CATALOG_BACKGROUND_TASKS = False tasks run inline (tests, management commands).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_queued: set = set()
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CATALOG_BACKGROUND_WORKERS', 2),
+                thread_name_prefix='catalog-bg',
+            )
+        return _executor
+
+
+def _run(fn, args, key) -> None:
+    if key is not None:
+        with _lock:
+            _queued.discard(key)
+    try:
+        fn(*args)
+    except Exception as exc:
+        logger.exception("Background task %s failed: %s", getattr(fn, '__name__', fn), exc)
+
+
+def _run_in_thread(fn, args, key) -> None:
+    try:
+        _run(fn, args, key)
+    finally:
+        connections.close_all()
+
+
+def submit(fn, *args, key=None, delay: float = 0) -> bool:
+    """Run fn(*args) in the background, `delay` seconds from now. Returns False if `key` is already queued."""
+    if key is not None:
+        with _lock:
+            if key in _queued:
+                return False
+            _queued.add(key)
+    if not getattr(settings, 'CATALOG_BACKGROUND_TASKS', True):
+        _run(fn, args, key)
+        return True
+    if delay > 0:
+        timer = threading.Timer(delay, lambda: _get_executor().submit(_run_in_thread, fn, args, key))
+        timer.daemon = True
+        timer.start()
+        return True
+    _get_executor().submit(_run_in_thread, fn, args, key)
+    return True
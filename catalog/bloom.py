@@ -0,0 +1,114 @@
+"""Rotating Bloom filter for anonymous (artwork_id, ip) views.
+
+`record_view` asks the filter before buffering an anonymous view: a hit means
+the pair was almost certainly logged already (false-positive rate
+CATALOG_VIEW_BLOOM_ERROR), so the view is dropped without any database work;
+only probable misses reach the flusher and its existence query.
+
+The filter rotates daily. Today's and yesterday's filters are both consulted
+so nothing falls off at midnight. On every buffer flush today's bits are
+OR-merged into the cache (`catalog:bloom:<YYYYMMDD>`), which lets other
+workers and restarted processes pick them up.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float, bits: bytes | None = None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        nbytes = (self.size + 7) // 8
+        self.bits = bytearray(bits) if bits and len(bits) == nbytes else bytearray(nbytes)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def merge(self, other: bytes) -> None:
+        if len(other) == len(self.bits):
+            self.bits = bytearray(a | b for a, b in zip(self.bits, other))
+
+
+class DailyBloom:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filters: dict = {}
+
+    @property
+    def capacity(self) -> int:
+        return getattr(settings, 'CATALOG_VIEW_BLOOM_CAPACITY', 100000)
+
+    @property
+    def error_rate(self) -> float:
+        return getattr(settings, 'CATALOG_VIEW_BLOOM_ERROR', 0.01)
+
+    @staticmethod
+    def _key(day) -> str:
+        return f'catalog:bloom:{day:%Y%m%d}'
+
+    def _filter(self, day) -> BloomFilter:
+        bloom = self._filters.get(day)
+        if bloom is None:
+            bloom = BloomFilter(self.capacity, self.error_rate, cache.get(self._key(day)))
+            self._filters[day] = bloom
+        return bloom
+
+    def _rotate(self):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        for day in list(self._filters):
+            if day not in (today, yesterday):
+                del self._filters[day]
+        return today, yesterday
+
+    def seen_or_add(self, item: str) -> bool:
+        """True if `item` was probably added today or yesterday; otherwise add it and return False."""
+        with self._lock:
+            today, yesterday = self._rotate()
+            current = self._filter(today)
+            if item in current or item in self._filter(yesterday):
+                return True
+            current.add(item)
+            return False
+
+    def checkpoint(self) -> None:
+        """OR-merge today's bits with the cached copy and store the result."""
+        with self._lock:
+            today, _ = self._rotate()
+            current = self._filter(today)
+            stored = cache.get(self._key(today))
+            if stored:
+                current.merge(stored)
+            bits = bytes(current.bits)
+        cache.set(self._key(today), bits, 2 * 86400)
+
+    def clear(self) -> None:
+        with self._lock:
+            today, yesterday = self._rotate()
+            self._filters = {}
+            cache.delete_many([self._key(today), self._key(yesterday)])
+
+
+anon_view_filter = DailyBloom()
+
+
+def anon_view_key(artwork_id: int, ip: str) -> str:
+    return f'{artwork_id}:{ip}'
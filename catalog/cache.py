@@ -0,0 +1,97 @@
+"""Cache keys and the catalog generation counter.
+
+Every cached listing artefact embeds the current generation in its key;
+bumping the generation on writes makes all of them unreachable at once,
+without having to enumerate and delete keys. Detail pages use the same
+scheme with a per-artwork version.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+
+
+GENERATION_KEY = 'catalog:generation'
+
+
+def _fresh_generation() -> int:
+    # Vaqtga asoslangan boshlang‘ich qiymat: kesh tozalansa ham eski kalitlar qaytmaydi
+    return int(time.time() * 1000)
+
+
+def catalog_generation() -> int:
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, _fresh_generation(), None)
+        value = cache.get(GENERATION_KEY, 0)
+    return value
+
+
+def bump_catalog_generation() -> None:
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, _fresh_generation(), None)
+
+
+def _normalize_number(value: str) -> str:
+    try:
+        return str(Decimal(value).normalize())
+    except (InvalidOperation, ValueError):
+        return value
+
+
+def filter_signature(filters: dict, *extra) -> str:
+    """Stable digest of the listing filters (order-insensitive, case-folded title)."""
+    norm = {
+        'title': ' '.join(filters.get('title', '').lower().split()),
+        'category': filters.get('category', ''),
+        'min_price': _normalize_number(filters.get('min_price', '')),
+        'max_price': _normalize_number(filters.get('max_price', '')),
+        'rating_gte': _normalize_number(filters.get('rating_gte', '')),
+    }
+    raw = json.dumps([norm, *extra], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def listing_page_key(params) -> str:
+    """Cache key for a rendered home listing page in the current generation.
+
+    Built from the exact query parameters, not the normalized filters: the page
+    echoes the raw values back (search box, pagination and facet links).
+    """
+    raw = json.dumps(sorted((key, list(values)) for key, values in params), default=str)
+    return f'catalog:page:{catalog_generation()}:{hashlib.sha1(raw.encode("utf-8")).hexdigest()}'
+
+
+def artwork_version(artwork_id: int) -> int:
+    """Per-artwork counterpart of the catalog generation, used by the detail page cache."""
+    key = f'catalog:artver:{artwork_id}'
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _fresh_generation(), None)
+        value = cache.get(key, 0)
+    return value
+
+
+def bump_artwork_version(artwork_id: int) -> None:
+    key = f'catalog:artver:{artwork_id}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), None)
+
+
+def artwork_slug_key(slug: str) -> str:
+    return f'catalog:slug:{hashlib.sha1(slug.encode("utf-8")).hexdigest()}'
+
+
+def detail_page_key(artwork_id: int, cpage, lang: str) -> str:
+    """Cache key for a rendered anonymous detail page in the artwork's current version."""
+    raw = json.dumps([cpage or '', lang or ''])
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f'catalog:detail:{artwork_id}:{artwork_version(artwork_id)}:{digest}'
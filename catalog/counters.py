@@ -0,0 +1,114 @@
+"""Denormalized Artwork columns: avg_rating, rating_count, views_count,
+comments_count and cover_image.
+
+Writes go through single UPDATE statements built from F-expressions, so
+concurrent requests never lose increments. `rebuild_counters` recomputes the
+columns from the source tables and is used to repair drift.
+"""
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Artwork, ArtworkImage, ArtworkView, Comment, Rating
+
+
+def _float(expr):
+    return ExpressionWrapper(expr, output_field=FloatField())
+
+
+def rating_added(artwork_id: int, value: int) -> None:
+    Artwork.objects.filter(pk=artwork_id).update(
+        avg_rating=_float((F('avg_rating') * F('rating_count') + value) / (F('rating_count') + 1.0)),
+        rating_count=F('rating_count') + 1,
+    )
+
+
+def rating_changed(artwork_id: int, old_value: int, new_value: int) -> None:
+    if old_value == new_value:
+        return
+    Artwork.objects.filter(pk=artwork_id, rating_count__gt=0).update(
+        avg_rating=_float(F('avg_rating') + (new_value - old_value) / (F('rating_count') * 1.0)),
+    )
+
+
+def rating_removed(artwork_id: int, value: int) -> None:
+    Artwork.objects.filter(pk=artwork_id, rating_count__gt=0).update(
+        avg_rating=Case(
+            When(rating_count__lte=1, then=Value(0.0)),
+            default=_float((F('avg_rating') * F('rating_count') - value) / (F('rating_count') - 1.0)),
+            output_field=FloatField(),
+        ),
+        rating_count=F('rating_count') - 1,
+    )
+
+
+def views_added(artwork_id: int, n: int = 1) -> None:
+    Artwork.objects.filter(pk=artwork_id).update(views_count=F('views_count') + n)
+
+
+def views_removed(artwork_id: int, n: int = 1) -> None:
+    Artwork.objects.filter(pk=artwork_id, views_count__gte=n).update(views_count=F('views_count') - n)
+
+
+def comments_added(artwork_id: int, n: int = 1) -> None:
+    Artwork.objects.filter(pk=artwork_id).update(comments_count=F('comments_count') + n)
+
+
+def comments_removed(artwork_id: int, n: int = 1) -> None:
+    Artwork.objects.filter(pk=artwork_id, comments_count__gte=n).update(comments_count=F('comments_count') - n)
+
+
+def _cover_subquery(artwork_ref='pk'):
+    return Coalesce(
+        Subquery(
+            ArtworkImage.objects.filter(artwork=OuterRef(artwork_ref))
+            .order_by('order', 'id')
+            .values('image')[:1]
+        ),
+        Value(''),
+    )
+
+
+def refresh_cover_image(artwork_id: int) -> None:
+    """Recompute cover_image after ArtworkImage rows are added, reordered or deleted."""
+    Artwork.objects.filter(pk=artwork_id).update(cover_image=_cover_subquery(), updated=timezone.now())
+
+
+def _count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(artwork=OuterRef('pk'))
+            .order_by()
+            .values('artwork')
+            .annotate(n=Count('pk'))
+            .values('n')[:1],
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def rebuild_counters(queryset=None) -> int:
+    """Recompute all counters (and cover_image) from their source tables in one UPDATE.
+
+    Returns the number of artworks touched.
+    """
+    if queryset is None:
+        queryset = Artwork.objects.all()
+    avg = Subquery(
+        Rating.objects.filter(artwork=OuterRef('pk'))
+        .order_by()
+        .values('artwork')
+        .annotate(a=Avg('value'))
+        .values('a')[:1],
+        output_field=FloatField(),
+    )
+    return queryset.update(
+        avg_rating=Coalesce(avg, 0.0),
+        rating_count=_count_subquery(Rating),
+        views_count=_count_subquery(ArtworkView),
+        comments_count=_count_subquery(Comment),
+        cover_image=_cover_subquery(),
+    )
@@ -0,0 +1,77 @@
+"""Facet counts for the home listing sidebar.
+
+Each facet is one grouped query over the listing queryset with every filter
+applied except the facet's own (so picking a category still shows how many
+results the other categories would give). Results are cached per filter
+signature and catalog generation.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .cache import catalog_generation, filter_signature
+from .listing import listing_queryset
+
+CENT = Decimal('0.01')
+
+
+def price_buckets():
+    """[(min, max), ...] from CATALOG_PRICE_BUCKETS boundaries; the last bucket is open-ended."""
+    bounds = list(getattr(settings, 'CATALOG_PRICE_BUCKETS', [0, 100000, 500000, 1000000, 5000000]))
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:] + [None])]
+
+
+def _facet_base(filters: dict, **cleared):
+    return listing_queryset({**filters, **cleared}).order_by().prefetch_related(None)
+
+
+def category_counts(filters: dict) -> dict:
+    rows = (
+        _facet_base(filters, category='')
+        .values('category__slug')
+        .annotate(n=Count('pk'))
+    )
+    return {r['category__slug']: r['n'] for r in rows if r['category__slug']}
+
+
+def price_bucket_counts(filters: dict) -> list:
+    buckets = price_buckets()
+    whens = []
+    for i, (lo, hi) in enumerate(buckets):
+        cond = Q(price__gte=lo)
+        if hi is not None:
+            cond &= Q(price__lt=hi)
+        whens.append(When(cond, then=Value(i)))
+    rows = (
+        _facet_base(filters, min_price='', max_price='')
+        .annotate(bucket=Case(*whens, default=Value(-1), output_field=IntegerField()))
+        .values('bucket')
+        .annotate(n=Count('pk'))
+    )
+    counts = {r['bucket']: r['n'] for r in rows}
+    return [
+        {
+            'min': lo,
+            'max': hi,
+            # max_price filtri "<=" — oraliq [min, max) bo‘lishi uchun bir tiyin kam
+            'max_param': str(Decimal(hi) - CENT) if hi is not None else '',
+            'count': counts.get(i, 0),
+        }
+        for i, (lo, hi) in enumerate(buckets)
+    ]
+
+
+def listing_facets(filters: dict) -> dict:
+    key = f'catalog:facets:{catalog_generation()}:{filter_signature(filters)}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = {
+            'categories': category_counts(filters),
+            'prices': price_bucket_counts(filters),
+        }
+        cache.set(key, facets, getattr(settings, 'CATALOG_FACET_CACHE_TIMEOUT', 300))
+    return facets
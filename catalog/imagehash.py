@@ -0,0 +1,164 @@
+"""Perceptual image hashes (dHash) and an in-memory BK-tree over them.
+
+`dhash` reduces an image to 64 bits describing its brightness gradients;
+re-encoded, resized or lightly edited copies of the same picture land
+within a few bits of each other. Hashes are stored on `Artwork.phash` and
+`ArtworkImage.phash`. `similar_images` answers "which stored images are
+within N bits of this one" through a BK-tree built from those columns.
+
+The tree is cached per process. A new hash is appended to a short log in
+the cache (`phash_added`) and every process inserts the log entries it has
+not seen yet into its tree. Only deletes and changed hashes bump the
+generation key (`catalog:phash:generation`), which makes each process
+rebuild the tree from both tables; so does a gap in the log.
+"""
+from __future__ import annotations
+
+import io
+import threading
+from typing import NamedTuple
+
+from django.core.cache import cache
+from PIL import Image
+
+from .cache import _fresh_generation
+from .models import Artwork, ArtworkImage
+
+GENERATION_KEY = 'catalog:phash:generation'
+SEQ_KEY = 'catalog:phash:seq'
+ADDED_KEY = 'catalog:phash:added:{}'
+ADDED_TTL = 86400
+# Shundan ko‘p yozuv ortda qolgan jarayon logni o‘qimasdan daraxtni qayta quradi
+MAX_REPLAY = 1000
+
+
+def dhash(source) -> str:
+    """64-bit difference hash as 16 hex chars. `source` is a path, file object or bytes."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with Image.open(source) as img:
+        pixels = img.convert('L').resize((9, 8), Image.LANCZOS).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f'{bits:016x}'
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class ImageRef(NamedTuple):
+    kind: str  # 'artwork' (Artwork.image) yoki 'gallery' (ArtworkImage)
+    pk: int
+    artwork_id: int
+
+
+class BKTree:
+    def __init__(self):
+        self.root = None  # [hash, refs, {distance: child}]
+        self.size = 0
+
+    def add(self, value: int, ref: ImageRef) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [ref], {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                if ref in node[1]:
+                    self.size -= 1  # qayta qurishdan keyin logdagi yozuv takrorlanishi mumkin
+                else:
+                    node[1].append(ref)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [ref], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list:
+        """[(distance, ref), ...] within max_distance, nearest first."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= max_distance:
+                found.extend((d, ref) for ref in node[1])
+            for edge, child in node[2].items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return sorted(found, key=lambda item: item[0])
+
+
+def bump_phash_generation() -> None:
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, _fresh_generation(), None)
+
+
+def phash_added(ref: ImageRef, phash: str) -> None:
+    """Append a new hash to the log that other processes replay into their trees."""
+    cache.add(SEQ_KEY, 0, None)
+    try:
+        seq = cache.incr(SEQ_KEY)
+    except ValueError:
+        bump_phash_generation()
+        return
+    cache.set(ADDED_KEY.format(seq), (ref.kind, ref.pk, ref.artwork_id, phash), ADDED_TTL)
+
+
+_lock = threading.Lock()
+_tree: BKTree | None = None
+_tree_generation = None
+_tree_seq = 0
+
+
+def build_tree() -> BKTree:
+    tree = BKTree()
+    for pk, value in Artwork.objects.exclude(phash='').values_list('pk', 'phash').iterator():
+        tree.add(int(value, 16), ImageRef('artwork', pk, pk))
+    rows = ArtworkImage.objects.exclude(phash='').values_list('pk', 'artwork_id', 'phash').iterator()
+    for pk, artwork_id, value in rows:
+        tree.add(int(value, 16), ImageRef('gallery', pk, artwork_id))
+    return tree
+
+
+def _replay(tree: BKTree, start: int, end: int) -> bool:
+    """Insert log entries start+1..end into `tree`; False if any of them is missing."""
+    keys = [ADDED_KEY.format(n) for n in range(start + 1, end + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return False
+    for key in keys:
+        kind, pk, artwork_id, value = found[key]
+        tree.add(int(value, 16), ImageRef(kind, pk, artwork_id))
+    return True
+
+
+def image_tree() -> BKTree:
+    global _tree, _tree_generation, _tree_seq
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Kesh kalitni chiqarib yuborgan bo‘lsa — eski daraxt avlodiga mos kelmaydigan yangi qiymat
+        cache.add(GENERATION_KEY, _fresh_generation(), None)
+        generation = cache.get(GENERATION_KEY)
+    seq = cache.get(SEQ_KEY) or 0
+    with _lock:
+        stale = _tree is None or _tree_generation != generation or seq < _tree_seq
+        if not stale and seq > _tree_seq:
+            stale = seq - _tree_seq > MAX_REPLAY or not _replay(_tree, _tree_seq, seq)
+        if stale:
+            _tree, _tree_generation = build_tree(), generation
+        _tree_seq = seq
+        return _tree
+
+
+def similar_images(phash: str, max_distance: int, exclude_artwork: int | None = None) -> list:
+    matches = image_tree().search(int(phash, 16), max_distance)
+    return [(d, ref) for d, ref in matches if ref.artwork_id != exclude_artwork]
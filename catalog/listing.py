@@ -0,0 +1,58 @@
+"""Home listing query building shared by the HTML and JSON views."""
+from __future__ import annotations
+
+from .models import Artwork
+from .search import search_queryset
+
+
+FILTER_PARAMS = ('title', 'category', 'min_price', 'max_price', 'rating_gte')
+
+# Tartiblash: GET qiymati -> ORDER BY maydoni
+ALLOWED_ORDER = {
+    'price': 'price',
+    '-price': '-price',
+    'rating': 'avg_rating',
+    '-rating': '-avg_rating',
+    'date': '-created',
+    '-date': 'created',
+}
+DEFAULT_ORDER = '-created'
+# Qidiruvda saralash tanlanmagan bo‘lsa — moslik bo‘yicha
+RELEVANCE_ORDER = ('-search_rank', DEFAULT_ORDER)
+
+
+def parse_listing_params(params) -> dict:
+    """Extract stripped filter/order values from a GET QueryDict."""
+    filters = {name: params.get(name, '').strip() for name in FILTER_PARAMS}
+    filters['order_by'] = params.get('order_by', '').strip()
+    return filters
+
+
+def listing_ordering(filters: dict) -> str:
+    """Single model field to sort by (used by keyset pagination)."""
+    return ALLOWED_ORDER.get(filters.get('order_by', ''), DEFAULT_ORDER)
+
+
+def listing_order_by(filters: dict) -> tuple:
+    """Full ORDER BY for offset pages, including search relevance."""
+    if filters.get('title') and filters.get('order_by', '') not in ALLOWED_ORDER:
+        return RELEVANCE_ORDER
+    return (listing_ordering(filters),)
+
+
+def listing_queryset(filters: dict):
+    """Filtered (but not yet ordered) Artwork queryset for the home listing."""
+    qs = Artwork.objects.select_related('author', 'category') \
+        .prefetch_related('images')
+
+    if filters.get('title'):
+        qs = search_queryset(qs, filters['title'])
+    if filters.get('category'):
+        qs = qs.filter(category__slug=filters['category'])
+    if filters.get('min_price'):
+        qs = qs.filter(price__gte=filters['min_price'])
+    if filters.get('max_price'):
+        qs = qs.filter(price__lte=filters['max_price'])
+    if filters.get('rating_gte'):
+        qs = qs.filter(avg_rating__gte=filters['rating_gte'])
+    return qs
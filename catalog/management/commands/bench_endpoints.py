@@ -0,0 +1,208 @@
+import io
+import random
+import shutil
+import statistics
+import string
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from catalog.analysis import analysis_languages, generate_analysis
+from catalog.httpclient import pool
+from catalog.models import Artwork, TelegramOutbox
+from catalog.outbox import deliver_due
+from catalog.standin import StandinConfig, StandinServer
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _words(n=4):
+    return ' '.join(''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 9))) for _ in range(n))
+
+
+def _noise_png(size=64) -> bytes:
+    # Tasodifiy shovqin — dHash bo‘yicha dublikat sifatida to‘silmaydi
+    from PIL import Image
+
+    img = Image.frombytes('L', (size, size), bytes(random.getrandbits(8) for _ in range(size * size)))
+    buf = io.BytesIO()
+    img.convert('RGB').save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure art_create, art_update, art_detail and order throughput against the local "
+        "OpenAI/Telegram stand-in (catalog.standin), including outbox delivery. "
+        "Everything runs inside one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help='Requests per endpoint (default 30).')
+        parser.add_argument('--latency-ms', type=float, default=200.0, help='Stand-in response delay (default 200).')
+        parser.add_argument('--jitter-ms', type=float, default=50.0)
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of stand-in 500 responses.')
+        parser.add_argument('--rate-limit', type=float, default=0.0, help='Share of stand-in 429 responses.')
+        parser.add_argument('--standin-url', default='',
+                            help='Use an already running stand-in (run_api_standin) instead of starting one.')
+
+    def handle(self, *args, **options):
+        server = None
+        if options['standin_url']:
+            base = options['standin_url'].rstrip('/')
+            openai_base, telegram_base = f'{base}/v1', base
+        else:
+            server = StandinServer(StandinConfig(
+                latency_ms=options['latency_ms'],
+                jitter_ms=options['jitter_ms'],
+                error_rate=options['error_rate'],
+                rate_limit_rate=options['rate_limit'],
+                retry_after=1,
+            )).start()
+            openai_base, telegram_base = server.openai_base, server.telegram_base
+            self.stdout.write(
+                f'Stand-in: {server.url} (kechikish {options["latency_ms"]:.0f}±{options["jitter_ms"]:.0f} ms, '
+                f'xato {options["error_rate"]:.0%}, 429 {options["rate_limit"]:.0%})'
+            )
+
+        media_root = tempfile.mkdtemp(prefix='bench-endpoints-')
+        overrides = override_settings(
+            OPENAI_API_KEY='standin',
+            OPENAI_API_BASE=openai_base,
+            MODERATION_ENABLED=True,
+            TELEGRAM_BOT_TOKEN='standin',
+            TELEGRAM_CHAT_ID='1',
+            TELEGRAM_API_BASE=telegram_base,
+            TELEGRAM_CHAT_MIN_INTERVAL=0,
+            # Fon oqimlari tranzaksiyadan tashqarida ishlaydi — o‘lchov paytida o‘chiriladi
+            TELEGRAM_OUTBOX_BACKGROUND=False,
+            CATALOG_VIEW_BUFFER_BACKGROUND=False,
+            CATALOG_BACKGROUND_TASKS=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            MEDIA_ROOT=media_root,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                'LOCATION': 'bench-endpoints'}},
+        )
+        try:
+            with overrides:
+                with transaction.atomic():
+                    self._run(options['requests'])
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('Tayyor: vaqtinchalik ma’lumotlar bekor qilindi.'))
+        finally:
+            pool.clear()
+            shutil.rmtree(media_root, ignore_errors=True)
+            if server is not None:
+                server.stop()
+                stats = ', '.join(f'{k}={v}' for k, v in sorted(server.config.stats.items()))
+                self.stdout.write(f'Stand-in so‘rovlari: {stats or "yo‘q"}')
+
+    def _run(self, n):
+        user = User.objects.create_user(username='bench-endpoints', password='-')
+        client = Client()
+        client.force_login(user)
+        anon = Client()
+
+        created = []
+
+        def create():
+            resp = client.post(reverse('catalog:create'), {
+                'title': _words(),
+                'price': random.randint(1, 5_000_000),
+                'description': _words(12),
+                'contact': '+998900000000',
+                'telegram': '',
+                'dimensions': '50x70',
+                'images-TOTAL_FORMS': '1',
+                'images-INITIAL_FORMS': '0',
+                'images-MIN_NUM_FORMS': '0',
+                'images-MAX_NUM_FORMS': '3',
+                'images-0-image': SimpleUploadedFile('bench.png', _noise_png(), content_type='image/png'),
+                'images-0-order': '0',
+            })
+            if resp.status_code == 302:
+                created.append(Artwork.objects.filter(author=user).latest('pk'))
+            return resp, 302
+
+        def update():
+            art = random.choice(created)
+            image = art.images.first()
+            return client.post(reverse('catalog:update', args=[art.slug]), {
+                'title': _words(),
+                'price': art.price,
+                'description': _words(12),
+                'contact': art.contact,
+                'telegram': '',
+                'dimensions': art.dimensions or '',
+                'images-TOTAL_FORMS': '1',
+                'images-INITIAL_FORMS': '1',
+                'images-MIN_NUM_FORMS': '0',
+                'images-MAX_NUM_FORMS': '3',
+                'images-0-id': str(image.pk),
+                'images-0-artwork': str(art.pk),
+                'images-0-order': '0',
+            }), 302
+
+        def detail(c):
+            return lambda: (c.get(reverse('catalog:detail', args=[random.choice(created).slug])), 200)
+
+        def order():
+            art = random.choice(created)
+            return anon.post(reverse('catalog:detail', args=[art.slug]), {'order_submit': '1'}), 302
+
+        results = [('art_create', self._measure(create, n))]
+        if not created:
+            raise CommandError('art_create hech bir e’lon yaratmadi — formani va stand-in holatini tekshiring.')
+        # Tranzaksiya ichida on_commit ishlamaydi — fon tahlilini shu yerda bajaramiz
+        start = time.perf_counter()
+        for art in created:
+            for lang in analysis_languages():
+                generate_analysis(art.pk, lang)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'AI tahlili (fon): {len(created)} ta e’lon, {elapsed * 1000 / len(created):.1f} ms/e’lon')
+
+        results += [
+            ('art_update', self._measure(update, n)),
+            ('art_detail (login)', self._measure(detail(client), n)),
+            ('art_detail (anonim)', self._measure(detail(anon), n)),
+            ('order_submit', self._measure(order, n)),
+        ]
+        for label, (samples, errors) in results:
+            self._report(label, samples, errors)
+
+        queued = TelegramOutbox.objects.filter(status=TelegramOutbox.Status.PENDING).count()
+        start = time.perf_counter()
+        sent = deliver_due(limit=queued)
+        elapsed = time.perf_counter() - start
+        rate = sent / elapsed if elapsed else 0.0
+        self.stdout.write(f'outbox deliver_due: {sent}/{queued} yuborildi, {elapsed * 1000:.0f} ms, {rate:.1f} xabar/s')
+
+    @staticmethod
+    def _measure(fn, calls):
+        samples, errors = [], 0
+        for _ in range(calls):
+            start = time.perf_counter()
+            resp, expected = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+            if resp.status_code != expected:
+                errors += 1
+        return samples, errors
+
+    def _report(self, label, samples, errors):
+        samples = sorted(samples)
+        mean = statistics.mean(samples)
+        self.stdout.write(
+            f'{label}: o‘rtacha {mean:.1f} ms, p50 {samples[len(samples) // 2]:.1f} ms, '
+            f'p95 {samples[max(0, int(len(samples) * 0.95) - 1)]:.1f} ms, '
+            f'{1000 / mean:.1f} so‘rov/s, kutilmagan javob: {errors}'
+        )
@@ -0,0 +1,92 @@
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from catalog.httpclient import pool, post_json
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    handshake_delay = 0.0
+
+    def setup(self):
+        # Yangi ulanish narxi (TCP + TLS qo‘l siqish) — har ulanishga bir marta
+        time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        body = json.dumps({'ok': True, 'result': {'message_id': 1}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-call latency of a fresh urllib connection per request with the pooled "
+        "keep-alive client (catalog.httpclient) against a local mock server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=200, help='Requests per client (default 200).')
+        parser.add_argument('--handshake-ms', type=float, default=30.0,
+                            help='Simulated per-connection setup cost in ms (default 30, roughly a TLS handshake).')
+
+    def handle(self, *args, **options):
+        handler = type('Handler', (_MockHandler,), {'handshake_delay': options['handshake_ms'] / 1000})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/sendMessage'
+        payload = {'chat_id': '1', 'text': 'bench'}
+
+        def urllib_call():
+            req = urllib.request.Request(
+                url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}
+            )
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                json.loads(resp.read())
+
+        def pooled_call():
+            post_json(url, payload, timeout=10)
+
+        try:
+            results = [
+                ('urllib (yangi ulanish)', self._measure(urllib_call, options['calls'])),
+                ('catalog.httpclient (pool)', self._measure(pooled_call, options['calls'])),
+            ]
+        finally:
+            pool.clear()
+            server.shutdown()
+            server.server_close()
+
+        for label, samples in results:
+            samples.sort()
+            self.stdout.write(
+                f'{label}: o‘rtacha {statistics.mean(samples):.2f} ms, '
+                f'p50 {samples[len(samples) // 2]:.2f} ms, p95 {samples[int(len(samples) * 0.95) - 1]:.2f} ms'
+            )
+        saved = statistics.mean(results[0][1]) - statistics.mean(results[1][1])
+        self.stdout.write(self.style.SUCCESS(f'Har chaqiruvda tejaldi: {saved:.2f} ms'))
+
+    @staticmethod
+    def _measure(fn, calls):
+        samples = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
@@ -0,0 +1,106 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from catalog.listing import listing_ordering, listing_queryset
+from catalog.models import Artwork, ArtworkView, Category, Comment, Rating
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large throwaway catalog, print EXPLAIN plans and timings for the home listing "
+        "and detail-page lookups, then repeat with the listing indexes dropped. "
+        "Everything runs inside one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Artworks to seed (default 50000).')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError('Only SQLite and PostgreSQL support transactional DDL needed for this benchmark.')
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                self._report('Indekslar bilan', options['repeat'])
+                self._drop_indexes()
+                self._report('Indekslarsiz', options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('Tayyor: vaqtinchalik ma’lumotlar bekor qilindi.'))
+
+    def _seed(self, rows):
+        self.stdout.write(f'{rows} ta e’lon yaratilmoqda...')
+        user = User.objects.create(username='explain-bench')
+        cats = [Category.objects.create(name=f'explain-bench-{i}') for i in range(10)]
+        now = timezone.now()
+        Artwork.objects.bulk_create(
+            [
+                Artwork(
+                    author=user,
+                    title=f'Bench art {i}',
+                    slug=f'explain-bench-{i}',
+                    price=Decimal(random.randint(1, 5_000_000)),
+                    contact='-',
+                    category=random.choice(cats),
+                    avg_rating=round(random.uniform(0, 5), 2),
+                    created=now - timedelta(minutes=i),
+                )
+                for i in range(rows)
+            ],
+            batch_size=2000,
+        )
+        self.art = Artwork.objects.filter(author=user).order_by('?').first()
+        self.user = user
+        self.category = cats[0]
+        Comment.objects.bulk_create(
+            [Comment(artwork_id=self.art.pk, user=user, text='-') for _ in range(200)]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _queries(self):
+        def listing(**filters):
+            return listing_queryset(filters).order_by(listing_ordering(filters))[:12]
+
+        return [
+            ('home: -created (default)', listing()),
+            ('home: price ↑', listing(order_by='price')),
+            ('home: price ↓', listing(order_by='-price')),
+            ('home: rating ↓', listing(order_by='-rating')),
+            ('home: category + date', listing(category=self.category.slug)),
+            ('home: price range', listing(min_price='1000', max_price='20000', order_by='price')),
+            ('detail: comments page', Comment.objects.filter(artwork=self.art).order_by('-created')[:10]),
+            ('detail: user rating', Rating.objects.filter(artwork=self.art, user=self.user)),
+            ('detail: user view', ArtworkView.objects.filter(artwork=self.art, user=self.user)),
+            ('detail: anon view', ArtworkView.objects.filter(artwork=self.art, user__isnull=True, ip_address='127.0.0.1')),
+        ]
+
+    def _report(self, title, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {title} ==='))
+        for label, qs in self._queries():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(qs.all())  # har safar yangi klon — natija keshi ishlatilmasin
+            ms = (time.perf_counter() - start) * 1000 / repeat
+            self.stdout.write(self.style.MIGRATE_LABEL(f'{label}: {ms:.2f} ms'))
+            self.stdout.write(qs.explain())
+
+    def _drop_indexes(self):
+        # schema_editor SQLite da tranzaksiya ichida ishlamaydi — to‘g‘ridan-to‘g‘ri DROP INDEX
+        with connection.cursor() as cursor:
+            for model in (Artwork, Comment):
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+            cursor.execute('ANALYZE')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from catalog.counters import rebuild_counters
+from catalog.models import Artwork
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized Artwork columns (rating, views, comments, cover image) from source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', action='append', default=[], help='Only rebuild the given artwork slug(s).')
+
+    def handle(self, *args, **options):
+        qs = Artwork.objects.all()
+        if options['slug']:
+            qs = qs.filter(slug__in=options['slug'])
+        n = rebuild_counters(qs)
+        self.stdout.write(self.style.SUCCESS(f'{n} ta e’lon hisoblagichlari qayta hisoblandi.'))
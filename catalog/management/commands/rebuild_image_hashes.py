@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from catalog.imagehash import bump_phash_generation, dhash
+from catalog.models import Artwork, ArtworkImage
+
+
+class Command(BaseCommand):
+    help = 'Compute dHash values for Artwork.image and ArtworkImage files that are missing one (or all with --all).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute hashes that are already stored.')
+
+    def handle(self, *args, **options):
+        n = 0
+        for model in (Artwork, ArtworkImage):
+            qs = model.objects.exclude(image='').exclude(image__isnull=True)
+            if not options['all']:
+                qs = qs.filter(phash='')
+            for obj in qs.only('pk', 'image').iterator():
+                try:
+                    value = dhash(obj.image.path)
+                except Exception as exc:
+                    self.stderr.write(f'{model.__name__} #{obj.pk}: {exc}')
+                    continue
+                model.objects.filter(pk=obj.pk).update(phash=value)
+                n += 1
+        bump_phash_generation()
+        self.stdout.write(self.style.SUCCESS(f'{n} ta rasm xeshi hisoblandi.'))
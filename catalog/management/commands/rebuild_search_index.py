@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Artwork full-text search index (SQLite FTS5 / PostgreSQL tsvector).'
+
+    def handle(self, *args, **options):
+        n = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Qidiruv indeksi yangilandi ({search.backend()}): {n} ta e’lon.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog.trigrams import rebuild_title_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the title trigram index used by near-duplicate detection.'
+
+    def handle(self, *args, **options):
+        n = rebuild_title_index()
+        self.stdout.write(self.style.SUCCESS(f'{n} ta e’lon sarlavhasi indekslandi.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from catalog.standin import StandinConfig, StandinServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the local OpenAI/Telegram stand-in server (catalog.standin) with configurable "
+        "latency, error rate and rate limiting. Start the app with the printed "
+        "OPENAI_API_BASE / TELEGRAM_API_BASE to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8900)
+        parser.add_argument('--latency-ms', type=float, default=200.0, help='Mean response delay (default 200).')
+        parser.add_argument('--jitter-ms', type=float, default=50.0, help='Uniform +/- jitter on the delay.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500.')
+        parser.add_argument('--rate-limit', type=float, default=0.0, help='Share of requests answered with 429.')
+        parser.add_argument('--retry-after', type=int, default=1, help='retry_after seconds sent with 429.')
+
+    def handle(self, *args, **options):
+        config = StandinConfig(
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit'],
+            retry_after=options['retry_after'],
+        )
+        server = StandinServer(config, options['host'], options['port'])
+        self.stdout.write(self.style.SUCCESS(f'Stand-in server: {server.url}'))
+        self.stdout.write(f'  OPENAI_API_BASE={server.openai_base}')
+        self.stdout.write(f'  TELEGRAM_API_BASE={server.telegram_base}')
+        self.stdout.write('  OPENAI_API_KEY va TELEGRAM_BOT_TOKEN istalgan bo‘sh bo‘lmagan qiymat bo‘lishi mumkin.')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.stdout.write(', '.join(f'{k}={v}' for k, v in sorted(config.stats.items())) or 'So‘rovlar yo‘q.')
@@ -0,0 +1,23 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from catalog.outbox import deliver_due
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending Telegram outbox messages (once, or continuously with --loop).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling every TELEGRAM_OUTBOX_POLL seconds.')
+        parser.add_argument('--limit', type=int, default=50, help='Messages per pass (default 50).')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_due(limit=options['limit'])
+            if sent or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'{sent} ta xabar yuborildi.'))
+            if not options['loop']:
+                return
+            time.sleep(settings.TELEGRAM_OUTBOX_POLL)
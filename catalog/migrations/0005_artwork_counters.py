@@ -0,0 +1,62 @@
+# Generated by Django 4.2.25 on 2026-10-18 07:48
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Artwork = apps.get_model('catalog', 'Artwork')
+    Rating = apps.get_model('catalog', 'Rating')
+    Comment = apps.get_model('catalog', 'Comment')
+    ArtworkView = apps.get_model('catalog', 'ArtworkView')
+
+    def count_of(model):
+        return Coalesce(Subquery(
+            model.objects.filter(artwork=OuterRef('pk')).order_by().values('artwork')
+            .annotate(n=Count('pk')).values('n')[:1],
+            output_field=IntegerField(),
+        ), 0)
+
+    avg = Subquery(
+        Rating.objects.filter(artwork=OuterRef('pk')).order_by().values('artwork')
+        .annotate(a=Avg('value')).values('a')[:1],
+        output_field=FloatField(),
+    )
+    Artwork.objects.update(
+        avg_rating=Coalesce(avg, 0.0),
+        rating_count=count_of(Rating),
+        views_count=count_of(ArtworkView),
+        comments_count=count_of(Comment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_artwork_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='avg_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Full-text search index for Artwork title/description (see catalog.search)
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_artwork_fts "
+                    "USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+                )
+            except Exception:
+                # SQLite FTS5 siz yig‘ilgan — qidiruv icontains ga qaytadi
+                return
+            cursor.execute(
+                "INSERT INTO catalog_artwork_fts (rowid, title, description) "
+                "SELECT id, title, COALESCE(description, '') FROM catalog_artwork"
+            )
+        elif conn.vendor == 'postgresql':
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_artwork_search ("
+                "artwork_id bigint PRIMARY KEY REFERENCES catalog_artwork (id) ON DELETE CASCADE "
+                "DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS catalog_artwork_search_document_gin "
+                "ON catalog_artwork_search USING GIN (document)"
+            )
+            cursor.execute(
+                "INSERT INTO catalog_artwork_search (artwork_id, document) SELECT id, "
+                "setweight(to_tsvector('simple', title), 'A') || "
+                "setweight(to_tsvector('simple', COALESCE(description, '')), 'B') FROM catalog_artwork"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute("DROP TABLE IF EXISTS catalog_artwork_fts")
+        elif conn.vendor == 'postgresql':
+            cursor.execute("DROP TABLE IF EXISTS catalog_artwork_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_artwork_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
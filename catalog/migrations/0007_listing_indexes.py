@@ -0,0 +1,41 @@
+# Generated by Django 4.2.25 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_artwork_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='artwork',
+            name='catalog_art_slug_f54581_idx',
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['created', 'id'], name='catalog_art_created_aa6282_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['price', 'id'], name='catalog_art_price_9e2731_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['avg_rating', 'id'], name='catalog_art_avg_rat_232d07_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['category', 'created'], name='catalog_art_categor_3f9961_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['category', 'price'], name='catalog_art_categor_e638a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['artwork', 'created'], name='catalog_com_artwork_82562f_idx'),
+        ),
+    ]
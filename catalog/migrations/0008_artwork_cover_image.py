@@ -0,0 +1,28 @@
+# Generated by Django 4.2.25 on 2026-10-18 07:56
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_cover_image(apps, schema_editor):
+    Artwork = apps.get_model('catalog', 'Artwork')
+    ArtworkImage = apps.get_model('catalog', 'ArtworkImage')
+    first = ArtworkImage.objects.filter(artwork=OuterRef('pk')).order_by('order', 'id').values('image')[:1]
+    Artwork.objects.update(cover_image=Coalesce(Subquery(first), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='cover_image',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_cover_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.25 on 2026-10-18 07:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_artwork_cover_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkViewSketch',
+            fields=[
+                ('artwork', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_sketch', serialize=False, to='catalog.artwork')),
+                ('registers', models.BinaryField(default=b'')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
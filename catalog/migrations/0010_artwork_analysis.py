@@ -0,0 +1,28 @@
+# Generated by Django 4.2.25 on 2026-10-18 08:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_artwork_view_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lang', models.CharField(max_length=16)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('ready', 'Tayyor'), ('failed', 'Xato')], default='ready', max_length=10)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('artwork', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='catalog.artwork')),
+            ],
+            options={
+                'unique_together': {('artwork', 'lang')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.25 on 2026-10-18 08:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_title_trigrams(apps, schema_editor):
+    # catalog.trigrams.title_trigrams nusxasi — migratsiya joriy koddan mustaqil
+    Artwork = apps.get_model('catalog', 'Artwork')
+    ArtworkTitleTrigram = apps.get_model('catalog', 'ArtworkTitleTrigram')
+    rows = []
+    for artwork_id, title in Artwork.objects.values_list('pk', 'title').iterator():
+        padded = '  ' + ' '.join((title or '').lower().split()) + ' '
+        grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+        rows.extend(ArtworkTitleTrigram(artwork_id=artwork_id, gram=g) for g in grams)
+    ArtworkTitleTrigram.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_telegram_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkTitleTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(db_index=True, max_length=3)),
+                ('artwork', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='title_trigrams', to='catalog.artwork')),
+            ],
+        ),
+        migrations.RunPython(backfill_title_trigrams, migrations.RunPython.noop),
+    ]
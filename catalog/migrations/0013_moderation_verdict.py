@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_artwork_title_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('text', 'Matn'), ('image', 'Rasm')], max_length=10)),
+                ('digest', models.CharField(max_length=64)),
+                ('version', models.CharField(max_length=64)),
+                ('flagged', models.BooleanField(default=False)),
+                ('score', models.FloatField(default=0)),
+                ('detail', models.JSONField(blank=True, default=dict)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'digest', 'version')},
+            },
+        ),
+    ]
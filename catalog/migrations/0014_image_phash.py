@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_moderation_verdict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='phash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='artworkimage',
+            name='phash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=16),
+        ),
+    ]
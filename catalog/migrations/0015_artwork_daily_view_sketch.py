@@ -0,0 +1,26 @@
+# Generated by Django 4.2.25 on 2026-10-18 08:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_image_phash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkDailyViewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField(default=b'')),
+                ('artwork', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_view_sketches', to='catalog.artwork')),
+            ],
+            options={
+                'unique_together': {('artwork', 'day')},
+            },
+        ),
+    ]
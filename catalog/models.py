@@ -59,16 +59,43 @@ class Artwork(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    # Denormallashtirilgan hisoblagichlar (catalog.counters orqali yangilanadi)
+    avg_rating = models.FloatField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Birinchi ArtworkImage fayl nomi (signals orqali yangilanadi) — kartalar uchun N+1 siz
+    cover_image = models.CharField(max_length=255, blank=True, default='')
+    # Asosiy rasmning dHash qiymati (16 hex, signals orqali) — dublikat rasm qidiruvi uchun
+    phash = models.CharField(max_length=16, blank=True, default='', db_index=True)
+
     class Meta:
         ordering = ['-created']
-        indexes = [models.Index(fields=['slug'])]
+        # home_view filtr/saralash yo‘llari; (maydon, id) — keyset pagination uchun.
+        # slug alohida indeks talab qilmaydi: unique=True allaqachon indeks beradi.
+        indexes = [
+            models.Index(fields=['created', 'id']),
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['avg_rating', 'id']),
+            models.Index(fields=['category', 'created']),
+            models.Index(fields=['category', 'price']),
+        ]
 
     def __str__(self):
         return self.title
 
+    # Faqat catalog.counters / signals yangilaydigan ustunlar
+    DENORMALIZED_FIELDS = ('avg_rating', 'rating_count', 'views_count', 'comments_count', 'cover_image', 'phash')
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = unique_slugify(self, self.title)
+        # Tahrirlashda eskirgan hisoblagichlarni bazaga qayta yozmaslik
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.DENORMALIZED_FIELDS
+            ]
         # Telegram manzilini avtomatik to‘g‘rilash
         if self.telegram:
             self.telegram = self.telegram.strip()
@@ -78,15 +105,24 @@ class Artwork(models.Model):
 
     @property
     def first_image_url(self):
-        """Agar asosiy image yo‘q bo‘lsa, bog‘langan ArtworkImage dan birinchi rasmni qaytaradi."""
+        """Agar asosiy image yo‘q bo‘lsa, bog‘langan ArtworkImage dan birinchi rasmni qaytaradi.
+
+        Bazaga so‘rov yubormaydi: cover_image ustuni yoki prefetch_related('images') keshi ishlatiladi.
+        """
         if self.image:
             try:
                 return self.image.url
             except Exception:
                 pass
-        if hasattr(self, 'images') and self.images.exists():
-            first_img = self.images.first()
-            if first_img and first_img.image:
+        if self.cover_image:
+            try:
+                return ArtworkImage._meta.get_field('image').storage.url(self.cover_image)
+            except Exception:
+                pass
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('images')
+        if prefetched:
+            first_img = prefetched[0]
+            if first_img.image:
                 try:
                     return first_img.image.url
                 except Exception:
@@ -104,6 +140,7 @@ class ArtworkImage(models.Model):
     artwork = models.ForeignKey(Artwork, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to=artwork_image_upload_to)
     order = models.PositiveIntegerField(default=0)
+    phash = models.CharField(max_length=16, blank=True, default='', db_index=True)
 
     class Meta:
         ordering = ['order', 'id']
@@ -135,6 +172,7 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [models.Index(fields=['artwork', 'created'])]
 
     def __str__(self):
         return f"Comment by {self.user} on {self.artwork}"
@@ -153,3 +191,102 @@ class ArtworkView(models.Model):
     def __str__(self):
         who = self.user.username if self.user else self.ip_address
         return f"View {self.artwork} by {who}"
+
+
+# --- NOYOB KO‘RUVCHILAR ESKIZI (HyperLogLog, catalog.sketches) ---
+class ArtworkViewSketch(models.Model):
+    artwork = models.OneToOneField(Artwork, on_delete=models.CASCADE, primary_key=True, related_name='view_sketch')
+    registers = models.BinaryField(default=b'')
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"View sketch for {self.artwork_id}"
+
+
+class ArtworkDailyViewSketch(models.Model):
+    # Kunlik eskizlar bazada: birlashtirish select_for_update ostida, barcha workerlar uchun umumiy
+    artwork = models.ForeignKey(Artwork, on_delete=models.CASCADE, related_name='daily_view_sketches')
+    day = models.DateField()
+    registers = models.BinaryField(default=b'')
+
+    class Meta:
+        unique_together = ('artwork', 'day')
+
+    def __str__(self):
+        return f"View sketch for {self.artwork_id} on {self.day}"
+
+
+# --- AI TAHLILI (fon rejimida to‘ldiriladi, catalog.analysis) ---
+class ArtworkAnalysis(models.Model):
+    class Status(models.TextChoices):
+        READY = 'ready', 'Tayyor'
+        FAILED = 'failed', 'Xato'
+
+    artwork = models.ForeignKey(Artwork, on_delete=models.CASCADE, related_name='analyses')
+    lang = models.CharField(max_length=16)
+    data = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.READY)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('artwork', 'lang')
+
+    def __str__(self):
+        return f"{self.artwork} [{self.lang}] {self.status}"
+
+
+# --- TELEGRAM XABARLARI NAVBATI (outbox, catalog.outbox) ---
+class TelegramOutbox(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Kutilmoqda'
+        SENT = 'sent', 'Yuborildi'
+        FAILED = 'failed', 'Xato'
+
+    # Bo‘sh — yetkazish paytidagi TELEGRAM_CHAT_ID ga yuboriladi
+    chat_id = models.CharField(max_length=64, blank=True)
+    text = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Telegram #{self.pk} [{self.status}]"
+
+
+# --- SARLAVHA TRIGRAMMALARI (dublikat tekshiruvi indeksi, catalog.trigrams) ---
+class ArtworkTitleTrigram(models.Model):
+    artwork = models.ForeignKey(Artwork, on_delete=models.CASCADE, related_name='title_trigrams')
+    gram = models.CharField(max_length=3, db_index=True)
+
+    def __str__(self):
+        return f"{self.artwork_id}: {self.gram!r}"
+
+
+# --- MODERATSIYA XULOSALARI (kontent SHA-256 bo‘yicha, catalog.moderation) ---
+class ModerationVerdict(models.Model):
+    class Kind(models.TextChoices):
+        TEXT = 'text', 'Matn'
+        IMAGE = 'image', 'Rasm'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    digest = models.CharField(max_length=64)
+    version = models.CharField(max_length=64)
+    flagged = models.BooleanField(default=False)
+    score = models.FloatField(default=0)
+    detail = models.JSONField(default=dict, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('kind', 'digest', 'version')
+
+    def __str__(self):
+        return f"{self.kind} {self.digest[:12]} {'flagged' if self.flagged else 'ok'}"
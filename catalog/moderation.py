@@ -1,40 +1,55 @@
 import base64
-import json
+import hashlib
 import logging
 import os
-import urllib.request
-from difflib import SequenceMatcher
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Iterable, Tuple
 
 from django.conf import settings
+from django.db.models import Q
+
+from .httpclient import openai_url, post_json
+from .models import ModerationVerdict
+from .imagehash import dhash, similar_images
+from .trigrams import near_duplicate
 
 logger = logging.getLogger(__name__)
 
+TEXT_MODEL = "omni-moderation-latest"
+IMAGE_MODEL = "gpt-4o-mini"
+BLOCK_MESSAGES = {
+    ModerationVerdict.Kind.TEXT: "Content blocked by AI moderation (text).",
+    ModerationVerdict.Kind.IMAGE: "Image blocked by AI moderation.",
+}
+BUSY_MESSAGE = "Moderation is busy right now. Please try again in a moment."
+
+# Barcha so‘rovlar uchun umumiy pool: tarmoq chaqiruvlari parallel, iplar soni cheklangan
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "MODERATION_WORKERS", 8), thread_name_prefix="moderation"
+)
+
 
-def _call_openai_moderation(text: str) -> Tuple[bool, float, dict]:
+def _call_openai_moderation(text: str, timeout: float = 10) -> Tuple[bool, float, dict]:
     """Return flagged, score, details using OpenAI moderation API."""
-    payload = {"model": "omni-moderation-latest", "input": text}
-    req = urllib.request.Request(
-        "https://api.openai.com/v1/moderations",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        },
+    payload = {"model": TEXT_MODEL, "input": text}
+    data = post_json(
+        openai_url("moderations"),
+        payload,
+        headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+        timeout=timeout,
     )
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
     res = data["results"][0]
     score = max(res["category_scores"].values() or [0])
     flagged = res.get("flagged", False) or score >= settings.MODERATION_THRESHOLD
     return flagged, score, res.get("categories", {})
 
 
-def _call_openai_image_moderation(img_bytes: bytes) -> Tuple[bool, float, str]:
+def _call_openai_image_moderation(img_bytes: bytes, timeout: float = 15) -> Tuple[bool, float, str]:
     """Use vision model to ask if image unsafe; return flagged, score, reason."""
     b64 = base64.b64encode(img_bytes).decode("ascii")
     payload = {
-        "model": "gpt-4o-mini",
+        "model": IMAGE_MODEL,
         "messages": [
             {
                 "role": "system",
@@ -50,62 +65,144 @@ def _call_openai_image_moderation(img_bytes: bytes) -> Tuple[bool, float, str]:
         ],
         "temperature": 0,
     }
-    req = urllib.request.Request(
-        "https://api.openai.com/v1/chat/completions",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        },
+    data = post_json(
+        openai_url("chat/completions"),
+        payload,
+        headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+        timeout=timeout,
     )
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
     content = data["choices"][0]["message"]["content"].lower()
     flagged = "unsafe" in content
     return flagged, 1.0 if flagged else 0.0, content
 
 
-def check_duplicates(title: str, existing_titles: Iterable[str]) -> Tuple[bool, float]:
-    """Detect near-duplicate titles."""
-    title_norm = title.strip().lower()
-    best = 0.0
-    for t in existing_titles:
-        s = SequenceMatcher(None, title_norm, t.strip().lower()).ratio()
-        best = max(best, s)
-        if best >= settings.MODERATION_DUP_THRESHOLD:
-            return True, best
-    return False, best
+def text_digest(text: str) -> str:
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def verdict_version(kind: str) -> str:
+    """Model + threshold a verdict was made with; changing either invalidates stored verdicts."""
+    if kind == ModerationVerdict.Kind.TEXT:
+        return f"{TEXT_MODEL}:{settings.MODERATION_THRESHOLD}"
+    return IMAGE_MODEL
+
+
+def stored_verdicts(keys) -> dict:
+    """{(kind, digest): flagged} for the keys already judged under the current versions."""
+    cond = Q(pk__in=[])
+    for kind, digest in keys:
+        cond |= Q(kind=kind, digest=digest, version=verdict_version(kind))
+    rows = ModerationVerdict.objects.filter(cond).values_list("kind", "digest", "flagged")
+    return {(kind, digest): flagged for kind, digest, flagged in rows}
+
+
+def store_verdict(kind: str, digest: str, flagged: bool, score: float, detail) -> None:
+    try:
+        ModerationVerdict.objects.get_or_create(
+            kind=kind, digest=digest, version=verdict_version(kind),
+            defaults={"flagged": flagged, "score": score, "detail": detail},
+        )
+    except Exception as exc:
+        logger.exception("Storing moderation verdict failed: %s", exc)
+
+
+def check_duplicates(title: str, exclude_pk=None) -> Tuple[bool, float]:
+    """Detect near-duplicate titles (candidates come from the trigram index)."""
+    return near_duplicate(title, exclude_pk=exclude_pk)
+
+
+def check_duplicate_images(images: Iterable[bytes], exclude_pk=None) -> bool:
+    """True if any image is within PHASH_DUP_DISTANCE bits of an image stored on another artwork."""
+    for img in images:
+        try:
+            value = dhash(img)
+        except OSError:
+            continue  # rasm sifatida o‘qilmadi — AI moderatsiyasi hal qiladi
+        if similar_images(value, settings.PHASH_DUP_DISTANCE, exclude_artwork=exclude_pk):
+            return True
+    return False
 
 
-def moderate_content(title: str, description: str, images: Iterable[bytes], existing_titles: Iterable[str]):
+def moderate_content(title: str, description: str, images: Iterable[bytes], exclude_pk=None):
     """
     Run text + image moderation and duplicate check.
     Returns (ok: bool, message: str).
+
+    A check that fails or is still running at MODERATION_DEADLINE lets the content
+    through; a check still queued behind other requests' checks rejects it (BUSY_MESSAGE).
     """
     if not settings.MODERATION_ENABLED:
         return True, ""
 
-    text = f"{title}\n\n{description}"
-    try:
-        flagged, score, _ = _call_openai_moderation(text)
-        if flagged:
-            return False, "Content blocked by AI moderation (text)."
-    except Exception as exc:
-        logger.exception("Text moderation failed: %s", exc)
-
+    # Dublikat tekshiruvi mahalliy (tarmoqsiz) — so‘rov oqimida, birinchi
     try:
-        dup_flag, dup_score = check_duplicates(title, existing_titles)
+        dup_flag, dup_score = check_duplicates(title, exclude_pk)
         if dup_flag:
             return False, "Duplicate or very similar listing title detected."
     except Exception as exc:
         logger.exception("Duplicate check failed: %s", exc)
 
-    for img in images:
-        try:
-            flagged, _, reason = _call_openai_image_moderation(img)
-            if flagged:
-                return False, "Image blocked by AI moderation."
-        except Exception as exc:
-            logger.exception("Image moderation failed: %s", exc)
+    # Vizual dublikat rasmlar — BK-tree orqali, API dan oldin
+    images = list(images)
+    try:
+        if check_duplicate_images(images, exclude_pk):
+            return False, "Duplicate or very similar image detected."
+    except Exception as exc:
+        logger.exception("Image duplicate check failed: %s", exc)
+
+    text = f"{title}\n\n{description}"
+    checks = [(ModerationVerdict.Kind.TEXT, text_digest(text), text)]
+    checks += [(ModerationVerdict.Kind.IMAGE, hashlib.sha256(img).hexdigest(), img) for img in images]
+    checks = list({(kind, digest): (kind, digest, payload) for kind, digest, payload in checks}.values())
+
+    # Avval baholangan kontent — bitta so‘rov bilan, API chaqirilmaydi
+    known = {}
+    try:
+        known = stored_verdicts([(kind, digest) for kind, digest, _ in checks])
+    except Exception as exc:
+        logger.exception("Moderation verdict lookup failed: %s", exc)
+    for kind, digest, _ in checks:
+        if known.get((kind, digest)):
+            return False, BLOCK_MESSAGES[kind]
+
+    # Yangi matn va rasmlar — parallel, umumiy MODERATION_DEADLINE ichida
+    deadline = time.monotonic() + settings.MODERATION_DEADLINE
+    pending = {}
+    for kind, digest, payload in checks:
+        if (kind, digest) in known:
+            continue
+        if kind == ModerationVerdict.Kind.TEXT:
+            future = _executor.submit(_call_openai_moderation, payload, min(10, settings.MODERATION_DEADLINE))
+        else:
+            future = _executor.submit(_call_openai_image_moderation, payload, min(15, settings.MODERATION_DEADLINE))
+        pending[future] = (kind, digest)
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Navbatda qolib umuman boshlanmagan tekshiruv — kontent tekshirilmagan, o‘tkazilmaydi
+                never_started = [future for future in pending if future.cancel()]
+                if never_started:
+                    logger.warning("Moderation deadline exceeded; %s check(s) never started, rejecting",
+                                   len(never_started))
+                    return False, BUSY_MESSAGE
+                logger.warning("Moderation deadline exceeded; %s check(s) unfinished, allowing content", len(pending))
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, digest = pending.pop(future)
+                try:
+                    flagged, score, detail = future.result()
+                except Exception as exc:
+                    logger.exception("Moderation call failed: %s", exc)
+                    continue
+                store_verdict(kind, digest, flagged, score, detail)
+                if flagged:
+                    return False, BLOCK_MESSAGES[kind]
+    finally:
+        # Navbatdagilar bekor qilinadi; ishlayotganlar o‘z timeout'i bilan tugaydi
+        for future in pending:
+            future.cancel()
 
     return True, ""
@@ -0,0 +1,189 @@
+"""Durable outbox for Telegram notifications.
+
+`order_submit` only inserts a `TelegramOutbox` row (`enqueue_telegram_message`)
+and returns. Delivery happens in `deliver_due`, driven either by an
+in-process background thread (woken after a row is committed) or by the
+`send_telegram_outbox --loop` worker process (Procfile `worker`). The
+in-process thread only starts on the first enqueue after a restart, so rows
+left pending or retrying by a previous process are picked up by the worker;
+run it wherever the web process is deployed.
+
+A row without a chat_id goes to TELEGRAM_CHAT_ID, resolved at delivery time,
+so messages queued before the setting exists are sent once it is set.
+
+A row is claimed with a conditional UPDATE that pushes `next_attempt_at`
+forward by a lease, so two senders never deliver the same row and a
+crashed sender's rows become due again after the lease. Failures are
+retried with exponential backoff up to TELEGRAM_OUTBOX_MAX_ATTEMPTS.
+Messages to one chat are spaced at least TELEGRAM_CHAT_MIN_INTERVAL
+seconds apart, and a 429 `retry_after` from Telegram pauses that chat.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .httpclient import HTTPStatusError, post_json, telegram_url
+from .models import TelegramOutbox
+
+logger = logging.getLogger(__name__)
+
+CLAIM_LEASE = timedelta(seconds=60)
+
+
+class SendResult(NamedTuple):
+    ok: bool
+    retry_after: float | None = None
+    permanent: bool = False
+    error: str = ''
+
+
+def send_telegram_message(chat_id: str, text: str) -> SendResult:
+    """One sendMessage call; classifies failures as retryable, rate-limited or permanent."""
+    token = getattr(settings, 'TELEGRAM_BOT_TOKEN', '')
+    try:
+        post_json(telegram_url(token, 'sendMessage'), {'chat_id': chat_id, 'text': text}, timeout=getattr(settings, 'TELEGRAM_TIMEOUT', 6))
+        return SendResult(ok=True)
+    except HTTPStatusError as exc:
+        body = exc.json()
+        description = body.get('description') or str(exc)
+        if exc.code == 429:
+            retry_after = (body.get('parameters') or {}).get('retry_after', 1)
+            return SendResult(ok=False, retry_after=float(retry_after), error=description)
+        # 4xx (noto‘g‘ri chat, bot bloklangan) qayta urinish bilan tuzalmaydi
+        return SendResult(ok=False, permanent=400 <= exc.code < 500, error=f'HTTP {exc.code}: {description}')
+    except Exception as exc:
+        return SendResult(ok=False, error=str(exc) or exc.__class__.__name__)
+
+
+def enqueue_telegram_message(text: str, chat_id: str | None = None) -> TelegramOutbox:
+    """Queue a message; without `chat_id` it goes to TELEGRAM_CHAT_ID as configured at delivery."""
+    if not (chat_id or getattr(settings, 'TELEGRAM_CHAT_ID', '')) or not getattr(settings, 'TELEGRAM_BOT_TOKEN', ''):
+        logger.warning("Telegram config missing: message kept in outbox until TELEGRAM_BOT_TOKEN/TELEGRAM_CHAT_ID are set")
+    row = TelegramOutbox.objects.create(chat_id=chat_id or '', text=text, next_attempt_at=timezone.now())
+    transaction.on_commit(outbox_sender.wake)
+    return row
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = getattr(settings, 'TELEGRAM_OUTBOX_BACKOFF', 5)
+    cap = getattr(settings, 'TELEGRAM_OUTBOX_MAX_BACKOFF', 3600)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+class _ChatLimiter:
+    """Earliest time (monotonic) the next message to each chat may go out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next: dict = {}
+
+    def wait_time(self, chat_id: str) -> float:
+        with self._lock:
+            return max(0.0, self._next.get(chat_id, 0.0) - time.monotonic())
+
+    def sent(self, chat_id: str) -> None:
+        with self._lock:
+            self._next[chat_id] = time.monotonic() + getattr(settings, 'TELEGRAM_CHAT_MIN_INTERVAL', 1.0)
+
+    def pause(self, chat_id: str, seconds: float) -> None:
+        with self._lock:
+            self._next[chat_id] = max(self._next.get(chat_id, 0.0), time.monotonic() + seconds)
+
+
+chat_limiter = _ChatLimiter()
+
+
+def _claim(row: TelegramOutbox, now) -> bool:
+    return bool(
+        TelegramOutbox.objects.filter(
+            pk=row.pk, status=TelegramOutbox.Status.PENDING, next_attempt_at=row.next_attempt_at
+        ).update(next_attempt_at=now + CLAIM_LEASE, attempts=F('attempts') + 1)
+    )
+
+
+def deliver_due(limit: int = 50, sleep=time.sleep) -> int:
+    """Send due outbox rows; returns how many were delivered."""
+    if not getattr(settings, 'TELEGRAM_BOT_TOKEN', ''):
+        return 0
+    default_chat = getattr(settings, 'TELEGRAM_CHAT_ID', '')
+    now = timezone.now()
+    qs = TelegramOutbox.objects.filter(status=TelegramOutbox.Status.PENDING, next_attempt_at__lte=now)
+    if not default_chat:
+        qs = qs.exclude(chat_id='')  # TELEGRAM_CHAT_ID o‘rnatilguncha kutadi
+    due = list(qs.order_by('next_attempt_at', 'pk')[:limit])
+    sent = 0
+    max_attempts = getattr(settings, 'TELEGRAM_OUTBOX_MAX_ATTEMPTS', 8)
+    for row in due:
+        chat_id = row.chat_id or default_chat
+        wait = chat_limiter.wait_time(chat_id)
+        if wait > getattr(settings, 'TELEGRAM_CHAT_MIN_INTERVAL', 1.0):
+            continue  # chat 429 sababli to‘xtatilgan — keyingi aylanishda
+        if not _claim(row, now):
+            continue
+        if wait:
+            sleep(wait)
+        result = send_telegram_message(chat_id, row.text)
+        attempts = row.attempts + 1
+        chat_limiter.sent(chat_id)
+        qs = TelegramOutbox.objects.filter(pk=row.pk)
+        if result.ok:
+            qs.update(status=TelegramOutbox.Status.SENT, sent_at=timezone.now(), last_error='')
+            sent += 1
+        elif result.retry_after is not None:
+            chat_limiter.pause(chat_id, result.retry_after)
+            # Telegram cheklovi — urinish sifatida hisoblanmaydi
+            qs.update(
+                attempts=F('attempts') - 1,
+                next_attempt_at=timezone.now() + timedelta(seconds=result.retry_after),
+                last_error=result.error,
+            )
+        elif result.permanent or attempts >= max_attempts:
+            logger.error("Telegram outbox message %s failed permanently: %s", row.pk, result.error)
+            qs.update(status=TelegramOutbox.Status.FAILED, last_error=result.error)
+        else:
+            logger.warning("Telegram outbox message %s attempt %s failed: %s", row.pk, attempts, result.error)
+            qs.update(next_attempt_at=timezone.now() + _backoff(attempts), last_error=result.error)
+    return sent
+
+
+class OutboxSender:
+    """Background thread that drains the outbox every TELEGRAM_OUTBOX_POLL seconds or when woken."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def wake(self) -> None:
+        if not getattr(settings, 'TELEGRAM_OUTBOX_BACKGROUND', True):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='telegram-outbox', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(getattr(settings, 'TELEGRAM_OUTBOX_POLL', 5))
+            self._wake.clear()
+            try:
+                deliver_due()
+            except Exception as exc:
+                logger.exception("Telegram outbox delivery failed: %s", exc)
+            finally:
+                connections.close_all()
+
+
+outbox_sender = OutboxSender()
@@ -0,0 +1,179 @@
+"""Paginators for the home listing.
+
+`KeysetPaginator` pages by a `(sort_key, id)` cursor instead of OFFSET, so
+page N costs the same as page 1 and no COUNT(*) is needed.
+`CachedCountPaginator` keeps offset pages but caches (and caps) the count.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import catalog_generation
+
+
+def encode_cursor(value, pk: int, direction: str) -> str:
+    raw = json.dumps({'v': value, 'id': pk, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str):
+    """Return (value, pk, direction) or None for a missing/invalid token."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction = data['d']
+        if direction not in ('next', 'prev'):
+            return None
+        return data['v'], int(data['id']), direction
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeError):
+        return None
+
+
+class KeysetPage:
+    """Minimal Page-like object: iterable, sized and with cursor links."""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """Cursor pagination over `queryset` ordered by `ordering` (e.g. '-price').
+
+    Rows are ordered by `(field, id)` in the same direction, which makes the
+    order total even when many rows share the same sort value.
+    """
+
+    def __init__(self, queryset, ordering: str, per_page: int):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = ordering.startswith('-')
+        self.field_name = ordering.lstrip('-')
+        self.field = queryset.model._meta.get_field(self.field_name)
+
+    def _order(self, reverse: bool):
+        desc = self.descending != reverse
+        prefix = '-' if desc else ''
+        return f'{prefix}{self.field_name}', f'{prefix}id'
+
+    def _after(self, value, pk: int, reverse: bool) -> Q:
+        """Rows strictly after (value, pk) in the (possibly reversed) order."""
+        op = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.field_name}__{op}': value})
+            | Q(**{self.field_name: value, f'id__{op}': pk})
+        )
+
+    def _key(self, obj):
+        return self.field.value_to_string(obj), obj.pk
+
+    def get_page(self, cursor: str | None) -> KeysetPage:
+        decoded = decode_cursor(cursor or '')
+        backwards = False
+        qs = self.queryset
+        if decoded is not None:
+            raw_value, pk, direction = decoded
+            backwards = direction == 'prev'
+            try:
+                value = self.field.to_python(raw_value)
+            except Exception:
+                value = None
+            if value is None:
+                decoded, backwards = None, False
+            else:
+                qs = qs.filter(self._after(value, pk, reverse=backwards))
+
+        rows = list(qs.order_by(*self._order(reverse=backwards))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, decoded is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(*self._key(rows[-1]), 'next')
+        if rows and has_previous:
+            previous_cursor = encode_cursor(*self._key(rows[0]), 'prev')
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor)
+
+
+class CachedCountPaginator(Paginator):
+    """Offset paginator whose count is cached per filter signature.
+
+    The count query is bounded: it never looks further than
+    CATALOG_COUNT_ESTIMATE_THRESHOLD rows plus one page, so the page right
+    after the threshold is still reachable while deeper page numbers fall back
+    to the last counted page. When more rows exist the count is reported as an
+    estimate and `display_count` renders e.g. "1000+".
+    """
+
+    def __init__(self, object_list, per_page, signature: str, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.signature = signature
+        self.threshold = getattr(settings, 'CATALOG_COUNT_ESTIMATE_THRESHOLD', 1000)
+        self.count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        key = f'catalog:count:{catalog_generation()}:{self.signature}:{self.threshold}'
+        cached = cache.get(key)
+        if cached is None:
+            limit = self.threshold + self.per_page
+            n = self.object_list.order_by().values('pk')[:limit].count()
+            cached = (n, n > self.threshold)
+            cache.set(key, cached, getattr(settings, 'CATALOG_COUNT_CACHE_TIMEOUT', 300))
+        n, self.count_is_estimate = cached
+        return n
+
+    @property
+    def display_count(self) -> str:
+        n = self.count
+        if self.count_is_estimate:
+            return f'{self.threshold}+'
+        return str(n)
+
+
+class KnownCountPaginator(Paginator):
+    """Offset paginator for a count that is already known (e.g. a denormalized counter)."""
+
+    def __init__(self, object_list, per_page, count: int, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
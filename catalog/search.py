@@ -0,0 +1,145 @@
+"""Full-text search over Artwork title and description.
+
+Backends, chosen from the active database vendor:
+
+* SQLite: FTS5 virtual table ``catalog_artwork_fts`` (rowid = artwork id),
+  ranked with bm25.
+* PostgreSQL: ``catalog_artwork_search`` table holding a weighted
+  ``tsvector`` per artwork behind a GIN index, ranked with ts_rank.
+* Anything else (or SQLite built without FTS5): icontains fallback.
+
+Every query word is matched as a prefix, so "mount" finds "Mountains".
+The index is kept in sync from Artwork post_save/post_delete signals;
+`rebuild_search_index` repopulates it from scratch.
+"""
+from __future__ import annotations
+
+import logging
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Artwork
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'catalog_artwork_fts'
+PG_TABLE = 'catalog_artwork_search'
+MAX_TERMS = 8
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_available: dict = {}
+
+
+def search_terms(query: str) -> list:
+    return _WORD_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def backend() -> str:
+    """'sqlite', 'postgresql' or 'basic' for the default connection."""
+    vendor = connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return 'basic'
+    key = (connection.alias, connection.settings_dict.get('NAME'))
+    if key not in _available:
+        table = FTS_TABLE if vendor == 'sqlite' else PG_TABLE
+        with connection.cursor() as cursor:
+            _available[key] = table in connection.introspection.table_names(cursor)
+    return vendor if _available[key] else 'basic'
+
+
+def _table(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def search_queryset(qs, query: str):
+    """Filter `qs` to artworks matching `query`, annotated with `search_rank` (higher is better)."""
+    terms = search_terms(query)
+    kind = backend() if terms else 'basic'
+    artwork_id = f'{_table(Artwork._meta.db_table)}.{_table("id")}'
+
+    if kind == 'sqlite':
+        match = ' '.join(f'"{t}"*' for t in terms)
+        fts = _table(FTS_TABLE)
+        return qs.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({fts}, 10.0, 1.0) FROM {fts} WHERE {fts} MATCH %s AND rowid = {artwork_id}',
+            [match],
+            output_field=FloatField(),
+        ))
+
+    if kind == 'postgresql':
+        tsquery = ' & '.join(f'{t}:*' for t in terms)
+        table = _table(PG_TABLE)
+        return qs.filter(
+            pk__in=RawSQL(
+                f"SELECT artwork_id FROM {table} WHERE document @@ to_tsquery('simple', %s)",
+                [tsquery],
+            )
+        ).annotate(search_rank=RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {table} WHERE artwork_id = {artwork_id}",
+            [tsquery],
+            output_field=FloatField(),
+        ))
+
+    query = (query or '').strip()
+    return qs.filter(
+        Q(title__icontains=query) | Q(description__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_artwork(artwork) -> None:
+    kind = backend()
+    title, description = artwork.title or '', artwork.description or ''
+    with connection.cursor() as cursor:
+        if kind == 'sqlite':
+            fts = _table(FTS_TABLE)
+            cursor.execute(f'DELETE FROM {fts} WHERE rowid = %s', [artwork.pk])
+            cursor.execute(
+                f'INSERT INTO {fts} (rowid, title, description) VALUES (%s, %s, %s)',
+                [artwork.pk, title, description],
+            )
+        elif kind == 'postgresql':
+            cursor.execute(
+                f"INSERT INTO {_table(PG_TABLE)} (artwork_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+                f"ON CONFLICT (artwork_id) DO UPDATE SET document = EXCLUDED.document",
+                [artwork.pk, title, description],
+            )
+
+
+def unindex_artwork(pk: int) -> None:
+    kind = backend()
+    with connection.cursor() as cursor:
+        if kind == 'sqlite':
+            cursor.execute(f'DELETE FROM {_table(FTS_TABLE)} WHERE rowid = %s', [pk])
+        elif kind == 'postgresql':
+            cursor.execute(f'DELETE FROM {_table(PG_TABLE)} WHERE artwork_id = %s', [pk])
+
+
+def rebuild_index() -> int:
+    """Repopulate the whole index from the Artwork table. Returns the row count."""
+    kind = backend()
+    art = _table(Artwork._meta.db_table)
+    with connection.cursor() as cursor:
+        if kind == 'sqlite':
+            fts = _table(FTS_TABLE)
+            cursor.execute(f'DELETE FROM {fts}')
+            cursor.execute(
+                f"INSERT INTO {fts} (rowid, title, description) "
+                f"SELECT id, title, COALESCE(description, '') FROM {art}"
+            )
+        elif kind == 'postgresql':
+            table = _table(PG_TABLE)
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(
+                f"INSERT INTO {table} (artwork_id, document) SELECT id, "
+                f"setweight(to_tsvector('simple', title), 'A') || "
+                f"setweight(to_tsvector('simple', COALESCE(description, '')), 'B') FROM {art}"
+            )
+        else:
+            return 0
+    return Artwork.objects.count()
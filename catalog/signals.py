@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from PIL import Image
-from .models import ArtworkImage, Artwork
+from . import analysis, counters, imagehash, search, trigrams
+from .cache import bump_artwork_version, bump_catalog_generation
+from .models import ArtworkAnalysis, ArtworkImage, Artwork, ArtworkView, Category, Comment, Rating
 
 def compress_image(image_path):
     try:
@@ -10,12 +13,186 @@ def compress_image(image_path):
     except Exception:
         pass
 
+def store_phash(model, instance, ref):
+    """Siqilgan fayldan dHash hisoblab ustunga yozadi.
+
+    Yangi xesh BK-tree ga qo‘shiladi; almashtirilgan yoki o‘chirilgan xesh daraxtni qayta qurdiradi.
+    """
+    try:
+        value = imagehash.dhash(instance.image.path) if instance.image else ''
+    except Exception:
+        value = ''
+    old = model.objects.filter(pk=instance.pk).values_list('phash', flat=True).first() or ''
+    if old == value:
+        return
+    model.objects.filter(pk=instance.pk).update(phash=value)
+    instance.phash = value
+    if old:
+        transaction.on_commit(imagehash.bump_phash_generation)
+    else:
+        transaction.on_commit(lambda: imagehash.phash_added(ref, value))
+
 @receiver(post_save, sender=Artwork)
 def compress_artwork_main(sender, instance, **kwargs):
     if instance.image:
         compress_image(instance.image.path)
+    # Rasm o‘zgarmagan tahrirda faylni qayta ochib xeshlash shart emas
+    if artwork_changed(instance, 'image'):
+        store_phash(Artwork, instance, imagehash.ImageRef('artwork', instance.pk, instance.pk))
 
 @receiver(post_save, sender=ArtworkImage)
 def compress_artwork_images(sender, instance, **kwargs):
     if instance.image:
         compress_image(instance.image.path)
+    store_phash(ArtworkImage, instance, imagehash.ImageRef('gallery', instance.pk, instance.artwork_id))
+
+@receiver(post_delete, sender=Artwork)
+@receiver(post_delete, sender=ArtworkImage)
+def forget_phash(sender, instance, **kwargs):
+    if instance.phash:
+        transaction.on_commit(imagehash.bump_phash_generation)
+
+
+# Rasm qo‘shilsa, tartibi o‘zgarsa yoki o‘chirilsa: cover_image qayta hisoblanadi,
+# "updated" yangilanadi — karta fragment keshi kaliti ham o‘zgaradi
+@receiver(post_save, sender=ArtworkImage)
+@receiver(post_delete, sender=ArtworkImage)
+def refresh_cover_on_image_change(sender, instance, **kwargs):
+    counters.refresh_cover_image(instance.artwork_id)
+
+
+# --- DENORMALLASHTIRILGAN HISOBLAGICHLAR ---
+@receiver(pre_save, sender=Rating)
+def remember_old_rating(sender, instance, **kwargs):
+    instance._old_value = None
+    if instance.pk:
+        instance._old_value = (
+            Rating.objects.filter(pk=instance.pk).values_list('value', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, **kwargs):
+    old_value = getattr(instance, '_old_value', None)
+    if created or old_value is None:
+        counters.rating_added(instance.artwork_id, instance.value)
+    else:
+        counters.rating_changed(instance.artwork_id, old_value, instance.value)
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    counters.rating_removed(instance.artwork_id, instance.value)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.comments_added(instance.artwork_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comments_removed(instance.artwork_id)
+
+
+@receiver(post_save, sender=ArtworkView)
+def view_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.views_added(instance.artwork_id)
+
+
+@receiver(post_delete, sender=ArtworkView)
+def view_deleted(sender, instance, **kwargs):
+    counters.views_removed(instance.artwork_id)
+
+
+# --- KATALOG KESH AVLODI (listing hisoblari va sahifalari uchun) ---
+@receiver(post_save, sender=Artwork)
+@receiver(post_delete, sender=Artwork)
+@receiver(post_save, sender=ArtworkImage)
+@receiver(post_delete, sender=ArtworkImage)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_generation()
+
+
+# --- QIDIRUV INDEKSI ---
+@receiver(post_save, sender=Artwork)
+def index_artwork_for_search(sender, instance, **kwargs):
+    search.index_artwork(instance)
+
+
+@receiver(post_delete, sender=Artwork)
+def unindex_artwork_for_search(sender, instance, **kwargs):
+    search.unindex_artwork(instance.pk)
+
+
+# --- E’LONNING ESKI QIYMATLARI ---
+# Artwork.save() tahrirlashda update_fields ga barcha oddiy maydonlarni yozadi, shuning
+# uchun qayta hisoblashdan oldin eski va yangi qiymatlar solishtiriladi
+TRACKED_FIELDS = ('title', 'description', 'image')
+
+
+@receiver(pre_save, sender=Artwork)
+def remember_old_artwork(sender, instance, **kwargs):
+    instance._old_fields = None
+    if instance.pk:
+        instance._old_fields = Artwork.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+def artwork_changed(instance, *fields) -> bool:
+    old = getattr(instance, '_old_fields', None)
+    if old is None:
+        return True
+    for name in fields:
+        value = getattr(instance, name)
+        if name == 'image':
+            value = value.name
+        if (old[name] or '') != (value or ''):
+            return True
+    return False
+
+
+# --- AI TAHLILI: matn yoki rasm o‘zgarsa fon rejimida qayta hisoblanadi ---
+@receiver(post_save, sender=Artwork)
+def schedule_artwork_analysis(sender, instance, **kwargs):
+    if not artwork_changed(instance, 'title', 'description', 'image'):
+        return
+    transaction.on_commit(lambda: analysis.schedule_analysis(instance.pk))
+
+
+@receiver(post_save, sender=ArtworkImage)
+@receiver(post_delete, sender=ArtworkImage)
+def schedule_analysis_on_image_change(sender, instance, **kwargs):
+    artwork_id = instance.artwork_id
+    transaction.on_commit(lambda: analysis.schedule_analysis(artwork_id))
+
+
+# --- DETAL SAHIFA KESHI: e’lonning o‘zi, rasmlari, reyting, izoh yoki AI tahlili o‘zgarsa ---
+@receiver(post_save, sender=Artwork)
+@receiver(post_delete, sender=Artwork)
+def invalidate_artwork_detail(sender, instance, **kwargs):
+    bump_artwork_version(instance.pk)
+
+
+@receiver(post_save, sender=ArtworkImage)
+@receiver(post_delete, sender=ArtworkImage)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=ArtworkAnalysis)
+def invalidate_related_detail(sender, instance, **kwargs):
+    bump_artwork_version(instance.artwork_id)
+
+
+# --- SARLAVHA TRIGRAMMA INDEKSI (dublikat tekshiruvi) ---
+@receiver(post_save, sender=Artwork)
+def index_title_trigrams(sender, instance, **kwargs):
+    if not artwork_changed(instance, 'title'):
+        return
+    trigrams.index_title(instance.pk, instance.title)
@@ -0,0 +1,218 @@
+"""Local stand-in for the OpenAI and Telegram endpoints the catalog calls.
+
+Serves the three routes used by `catalog.moderation`, `catalog.ai_content`
+and `catalog.outbox`:
+
+    POST /v1/moderations
+    POST /v1/chat/completions      (image safety check and content analysis)
+    POST /bot<token>/sendMessage
+
+with configurable latency, server errors (500) and rate-limit responses
+(429 with `retry_after`, in each API's own format). Point the app at it with
+OPENAI_API_BASE=<url>/v1 and TELEGRAM_API_BASE=<url>; the
+`run_api_standin` command does that for a dev server and `bench_endpoints`
+uses it for latency measurements. Text or image descriptions containing one
+of `flag_terms` are reported as unsafe.
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class StandinConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 1
+    flag_terms: tuple = ('unsafe-demo',)
+    seed: int | None = None
+    stats: Counter = field(default_factory=Counter)
+
+
+def _route(path: str) -> str | None:
+    if path.rstrip('/').endswith('/moderations'):
+        return 'moderations'
+    if path.rstrip('/').endswith('/chat/completions'):
+        return 'chat'
+    if path.startswith('/bot') and path.endswith('/sendMessage'):
+        return 'telegram'
+    return None
+
+
+def _texts(payload: dict) -> list:
+    """Every text fragment in a moderation input or chat messages payload."""
+    if 'input' in payload:
+        value = payload['input']
+        return value if isinstance(value, list) else [str(value)]
+    texts = []
+    for message in payload.get('messages') or []:
+        content = message.get('content')
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(part.get('text', '') for part in content or [] if part.get('type') == 'text')
+    return texts
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    config: StandinConfig = StandinConfig()
+    rng: random.Random = random.Random()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+        route = _route(self.path)
+        if route is None:
+            return self._send(404, {'error': {'message': f'Unknown route {self.path}'}})
+        try:
+            payload = json.loads(raw or b'{}')
+        except ValueError:
+            return self._send(400, {'error': {'message': 'Invalid JSON body'}})
+
+        cfg = self.config
+        with self.lock:
+            delay = max(0.0, cfg.latency_ms + self.rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+            roll = self.rng.random()
+        time.sleep(delay)
+
+        if roll < cfg.rate_limit_rate:
+            self._count(route, 429)
+            return self._rate_limited(route)
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            self._count(route, 500)
+            if route == 'telegram':
+                return self._send(500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'})
+            return self._send(500, {'error': {'message': 'The server had an error', 'type': 'server_error'}})
+
+        self._count(route, 200)
+        flagged = any(term in text.lower() for text in _texts(payload) for term in cfg.flag_terms)
+        if route == 'moderations':
+            return self._send(200, self._moderation(payload, flagged))
+        if route == 'chat':
+            return self._send(200, self._chat(payload, flagged))
+        return self._send(200, {
+            'ok': True,
+            'result': {'message_id': cfg.stats['telegram:200'], 'chat': {'id': payload.get('chat_id')},
+                       'text': payload.get('text', '')},
+        })
+
+    def _count(self, route: str, status: int) -> None:
+        with self.lock:
+            self.config.stats[f'{route}:{status}'] += 1
+
+    def _rate_limited(self, route: str):
+        retry_after = self.config.retry_after
+        if route == 'telegram':
+            body = {'ok': False, 'error_code': 429, 'description': f'Too Many Requests: retry after {retry_after}',
+                    'parameters': {'retry_after': retry_after}}
+        else:
+            body = {'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}}
+        return self._send(429, body, {'Retry-After': str(retry_after)})
+
+    @staticmethod
+    def _moderation(payload: dict, flagged: bool) -> dict:
+        score = 0.97 if flagged else 0.001
+        categories = ('sexual', 'hate', 'harassment', 'self-harm', 'violence')
+        return {
+            'id': 'modr-standin',
+            'model': payload.get('model', ''),
+            'results': [{
+                'flagged': flagged,
+                'categories': {c: flagged and c == 'violence' for c in categories},
+                'category_scores': {c: score if c == 'violence' else 0.001 for c in categories},
+            }],
+        }
+
+    @staticmethod
+    def _chat(payload: dict, flagged: bool) -> dict:
+        messages = payload.get('messages') or [{}]
+        system = messages[0].get('content') if isinstance(messages[0].get('content'), str) else ''
+        if 'safety checker' in system:
+            content = 'UNSAFE: matched a flag term' if flagged else 'SAFE: nothing harmful found'
+        else:
+            content = json.dumps({
+                'title': 'Stand-in title',
+                'description': 'Stand-in description.',
+                'tags': ['art', 'painting', 'standin'],
+                'style': 'oil on canvas',
+                'category': 'painting',
+                'hashtags': ['art', 'painting', 'standin'],
+                'summary': 'Generated by the local stand-in server.',
+            })
+        return {
+            'id': 'chatcmpl-standin',
+            'object': 'chat.completion',
+            'model': payload.get('model', ''),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        }
+
+    def _send(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandinServer:
+    """Threaded stand-in server; `start()` returns once it is accepting connections."""
+
+    def __init__(self, config: StandinConfig | None = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or StandinConfig()
+        handler = type('Handler', (StandinHandler,), {
+            'config': self.config,
+            'rng': random.Random(self.config.seed),
+            'lock': threading.Lock(),
+        })
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def openai_base(self) -> str:
+        return f'{self.url}/v1'
+
+    @property
+    def telegram_base(self) -> str:
+        return self.url
+
+    def start(self) -> 'StandinServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='api-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
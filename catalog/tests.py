@@ -1,12 +1,45 @@
-from django.test import TestCase, Client
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
-from .models import Artwork, Category, Rating, ArtworkView, Comment
+from django.utils.http import http_date
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from .models import (
+    Artwork, ArtworkAnalysis, ArtworkImage, Category, Rating, ArtworkView, Comment, ModerationVerdict, TelegramOutbox,
+)
+from .management.commands.seed_demo import tiny_png_bytes
+from .facets import listing_facets
+from .pagination import KeysetPaginator
+from .sketches import HyperLogLog, unique_viewers
+from .ai_content import analysis_cache, analyze_content
+from .analysis import generate_analysis, schedule_analysis
+from .bloom import anon_view_filter
+from .httpclient import HTTPClientError, pool, post_json
+from .imagehash import GENERATION_KEY as PHASH_GENERATION_KEY, image_tree
+from .management.commands.bench_http import _MockHandler
+from .moderation import BUSY_MESSAGE, check_duplicate_images, check_duplicates, moderate_content
+from .outbox import SendResult, chat_limiter, deliver_due, send_telegram_message
+from .standin import StandinConfig, StandinServer
+from .viewlog import flush_views, view_buffer
 
 
+# Test tranzaksiyasi ichida fon oqimi bazaga yozmasin — bufer qo‘lda flush qilinadi
+@override_settings(CATALOG_VIEW_BUFFER_BACKGROUND=False)
 class CatalogTests(TestCase):
     def setUp(self):
+        view_buffer.clear()
+        anon_view_filter.clear()
+        self.addCleanup(view_buffer.clear)
         self.client = Client()
         self.user = User.objects.create_user(username='alice', password='pass12345')
         self.user2 = User.objects.create_user(username='bob', password='pass12345')
@@ -44,12 +77,15 @@ class CatalogTests(TestCase):
         url = reverse('catalog:detail', args=[self.art.slug])
         # Anonymous counts once per IP
         self.client.get(url)
+        flush_views()
         self.assertEqual(ArtworkView.objects.filter(artwork=self.art).count(), 1)
         self.client.get(url)
+        flush_views()
         self.assertEqual(ArtworkView.objects.filter(artwork=self.art).count(), 1)
         # Logged-in different user should increment
         self.client.login(username='bob', password='pass12345')
         self.client.get(url)
+        flush_views()
         self.assertEqual(ArtworkView.objects.filter(artwork=self.art).count(), 2)
 
     def test_search_filter(self):
@@ -63,3 +99,495 @@ class CatalogTests(TestCase):
         url = reverse('catalog:detail', args=[self.art.slug])
         resp = self.client.post(url, {'text': 'hi', 'comment_submit': '1'})
         self.assertEqual(resp.status_code, 302)
+
+    def test_denormalized_counters(self):
+        r1 = Rating.objects.create(artwork=self.art, user=self.user, value=5)
+        Rating.objects.create(artwork=self.art, user=self.user2, value=2)
+        r1.value = 3
+        r1.save()
+        c = Comment.objects.create(artwork=self.art, user=self.user2, text='ok')
+        ArtworkView.objects.create(artwork=self.art, ip_address='1.1.1.1')
+        self.art.refresh_from_db()
+        self.assertEqual(self.art.rating_count, 2)
+        self.assertAlmostEqual(self.art.avg_rating, 2.5)
+        self.assertEqual(self.art.comments_count, 1)
+        self.assertEqual(self.art.views_count, 1)
+
+        c.delete()
+        r1.delete()
+        self.art.refresh_from_db()
+        self.assertEqual(self.art.comments_count, 0)
+        self.assertEqual((self.art.rating_count, self.art.avg_rating), (1, 2.0))
+
+        Artwork.objects.filter(pk=self.art.pk).update(views_count=99, avg_rating=0)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.art.refresh_from_db()
+        self.assertEqual((self.art.views_count, self.art.avg_rating), (1, 2.0))
+
+    def test_keyset_pagination(self):
+        for i in range(25):
+            Artwork.objects.create(author=self.user, title=f'Art {i}', price=i % 4, contact='1', category=self.cat)
+        for ordering in ('-price', 'created', 'avg_rating'):
+            tiebreak = '-id' if ordering.startswith('-') else 'id'
+            expected = list(Artwork.objects.order_by(ordering, tiebreak).values_list('pk', flat=True))
+            paginator = KeysetPaginator(Artwork.objects.all(), ordering, 12)
+
+            seen, cursor, pages = [], None, []
+            while True:
+                page = paginator.get_page(cursor)
+                pages.append(page)
+                seen += [a.pk for a in page]
+                if not page.has_next():
+                    break
+                cursor = page.next_cursor
+            self.assertEqual(seen, expected)
+            self.assertFalse(pages[0].has_previous())
+
+        back = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual([a.pk for a in back], [a.pk for a in pages[-2]])
+
+        resp = self.client.get(reverse('catalog:home'), {'order_by': 'price', 'cursor': ''})
+        self.assertEqual(len(resp.context['page_obj']), 12)
+        self.assertTrue(resp.context['page_obj'].next_cursor)
+
+    @override_settings(CATALOG_COUNT_ESTIMATE_THRESHOLD=3)
+    def test_cached_listing_count(self):
+        self.client.login(username='alice', password='pass12345')  # sahifa keshini chetlab o‘tish
+        url = reverse('catalog:home')
+        self.assertEqual(self.client.get(url).context['page_obj'].paginator.count, 1)
+        with self.assertNumQueries(5):  # sessiya + user + kategoriyalar + sahifa + rasmlar; COUNT keshdan
+            self.client.get(url).context['page_obj'].paginator.count
+        Artwork.objects.create(author=self.user, title='Lake', price=5, contact='1', category=self.cat)
+        self.assertEqual(self.client.get(url).context['page_obj'].paginator.count, 2)
+
+        for i in range(3):
+            Artwork.objects.create(author=self.user, title=f'More {i}', price=5, contact='1')
+        paginator = self.client.get(url).context['page_obj'].paginator
+        self.assertTrue(paginator.count_is_estimate)
+        self.assertEqual(paginator.display_count, '3+')
+        with self.assertNumQueries(5):  # chuqur sahifa ham o‘sha kesh kalitidan o‘qiydi
+            page_obj = self.client.get(url, {'page': 10 ** 9}).context['page_obj']
+        self.assertEqual(page_obj.number, page_obj.paginator.num_pages)
+
+    def test_full_text_search_ranks_and_tracks_edits(self):
+        Artwork.objects.create(author=self.user, title='Blue lake', description='calm mountains', price=1, contact='1')
+        best = Artwork.objects.create(author=self.user, title='Mountain lake', price=1, contact='1')
+        url = reverse('catalog:home')
+        titles = [a.title for a in self.client.get(url, {'title': 'mount lak'}).context['page_obj']]
+        self.assertEqual(titles, ['Mountain lake', 'Blue lake'])
+
+        best.title = 'Desert'
+        best.save()
+        titles = [a.title for a in self.client.get(url, {'title': 'mount'}).context['page_obj']]
+        self.assertEqual(titles, ['Blue lake'])
+        best.delete()
+        self.assertContains(self.client.get(url, {'title': 'desert'}), 'Hech narsa topilmadi')
+
+    def test_anonymous_listing_page_cache(self):
+        url = reverse('catalog:home')
+        self.assertContains(self.client.get(url), 'Sunset')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), 'Sunset')
+        self.art.delete()
+        self.assertNotContains(self.client.get(url), 'Sunset')
+
+    def test_listing_page_cache_keeps_raw_query(self):
+        url = reverse('catalog:home')
+        self.assertContains(self.client.get(url, {'title': 'SUNSET'}), 'title=SUNSET')
+        # Normallashtirilgan filtr bir xil, lekin sahifadagi havolalar so‘rovning o‘zini takrorlaydi
+        resp = self.client.get(url, {'title': 'sunset'})
+        self.assertContains(resp, 'title=sunset')
+        self.assertNotContains(resp, 'title=SUNSET')
+
+    def test_listing_facets(self):
+        other = Category.objects.create(name='Foto')
+        Artwork.objects.create(author=self.user, title='Photo', price=200000, contact='1', category=other)
+        facets = listing_facets({'category': self.cat.slug, 'title': '', 'min_price': '', 'max_price': '', 'rating_gte': ''})
+        self.assertEqual(facets['categories'], {self.cat.slug: 1, other.slug: 1})
+        counts = [b['count'] for b in facets['prices']]
+        self.assertEqual(counts, [1, 0, 0, 0, 0])  # kategoriya filtri narx sonlariga ta’sir qiladi
+
+        resp = self.client.get(reverse('catalog:home'))
+        self.assertEqual({c.slug: c.facet_count for c in resp.context['categories']}, {self.cat.slug: 1, other.slug: 1})
+
+        # Narx havolalari yangi filtrning birinchi sahifasini ochadi — cursor/page tashlanadi
+        self.client.login(username='alice', password='pass12345')
+        resp = self.client.get(reverse('catalog:home'), {'cursor': '', 'page': '2'})
+        self.assertContains(resp, 'href="?min_price=0')
+        self.assertNotContains(resp, 'cursor=&amp;min_price')
+
+    def test_listing_json_etag(self):
+        url = reverse('catalog:home_json')
+        resp = self.client.get(url, {'order_by': 'price'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([a['slug'] for a in resp.json()['results']], [self.art.slug])
+        etag = resp['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertNotIn('views_count', resp.json()['results'][0])
+
+        resp = self.client.get(url, {'order_by': 'price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        Artwork.objects.create(author=self.user, title='Fresh', price=1, contact='1')
+        resp = self.client.get(url, {'order_by': 'price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['results'][0]['title'], 'Fresh')
+
+    def test_card_fragment_cache(self):
+        self.client.login(username='alice', password='pass12345')
+        url = reverse('catalog:home')
+        self.assertContains(self.client.get(url), 'Sunset')
+        # Kesh kaliti updated ga bog‘liq: updated o‘zgarmagan bo‘lsa eski karta qaytadi
+        Artwork.objects.filter(pk=self.art.pk).update(title='Stale')
+        self.assertContains(self.client.get(url), 'Sunset')
+        self.art.title = 'Dawn'
+        self.art.save()
+        self.assertContains(self.client.get(url), 'Dawn')
+
+    def test_cover_image_without_per_card_queries(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        with self.settings(MEDIA_ROOT=media_root):
+            second = ArtworkImage.objects.create(
+                artwork=self.art, order=1, image=SimpleUploadedFile('b.png', tiny_png_bytes()))
+            first = ArtworkImage.objects.create(
+                artwork=self.art, order=0, image=SimpleUploadedFile('a.png', tiny_png_bytes()))
+            art = Artwork.objects.get(pk=self.art.pk)
+            self.assertEqual(art.cover_image, first.image.name)
+            with self.assertNumQueries(0):
+                self.assertTrue(art.first_image_url.endswith(first.image.name))
+
+            first.delete()
+            art.refresh_from_db()
+            self.assertEqual(art.cover_image, second.image.name)
+
+    def test_view_logging_is_buffered(self):
+        self.client.login(username='bob', password='pass12345')
+        url = reverse('catalog:detail', args=[self.art.slug])
+        for _ in range(3):
+            self.client.get(url)
+        self.assertEqual(ArtworkView.objects.count(), 0)
+        self.assertEqual(len(view_buffer), 3)
+        self.assertEqual(flush_views(), 1)
+        self.art.refresh_from_db()
+        self.assertEqual(self.art.views_count, 1)
+
+    def test_unique_viewer_sketch(self):
+        hll = HyperLogLog()
+        for i in range(10000):
+            hll.add(f'ip:{i}')
+        self.assertAlmostEqual(hll.count(), 10000, delta=500)
+
+        cache.clear()
+        url = reverse('catalog:detail', args=[self.art.slug])
+        for ip in ('10.0.0.1', '10.0.0.2', '10.0.0.1'):
+            self.client.get(url, REMOTE_ADDR=ip)
+        self.client.login(username='bob', password='pass12345')
+        self.client.get(url)
+        flush_views()
+        cache.clear()  # kunlik eskizlar bazada — kesh tozalansa ham yo‘qolmaydi
+        self.assertEqual(unique_viewers(self.art.pk), 3)
+        self.assertEqual(unique_viewers(self.art.pk, days=7), 3)
+
+    def test_anonymous_repeat_views_skip_buffer(self):
+        url = reverse('catalog:detail', args=[self.art.slug])
+        for _ in range(3):
+            self.client.get(url, REMOTE_ADDR='10.0.0.9')
+        self.client.get(url, REMOTE_ADDR='10.0.0.10')
+        self.assertEqual(len(view_buffer), 2)
+        self.assertEqual(flush_views(), 2)
+        # Boshqa worker: xotiradagi filtr bo‘sh, lekin kesh checkpointidan tiklanadi
+        anon_view_filter._filters = {}
+        self.client.get(url, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(len(view_buffer), 0)
+
+    @override_settings(OPENAI_API_KEY='test-key', CATALOG_BACKGROUND_TASKS=False, AI_ANALYSIS_LANGUAGES=['en'])
+    def test_ai_analysis_is_precomputed(self):
+        with mock.patch('catalog.analysis.analyze_content', return_value={'summary': 'Quyosh botishi'}) as analyze:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.art.description = 'Yangi tavsif'
+                self.art.save()
+            self.assertEqual(analyze.call_count, 1)
+            # Narx/aloqa tahriri tahlilni qayta boshlamaydi
+            with self.captureOnCommitCallbacks(execute=True):
+                self.art.price = 99
+                self.art.save()
+            self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(ArtworkAnalysis.objects.get(artwork=self.art, lang='en').data['summary'], 'Quyosh botishi')
+
+        with mock.patch('catalog.analysis.analyze_content', side_effect=AssertionError('no inline call')):
+            resp = self.client.get(reverse('catalog:detail', args=[self.art.slug]), {'lang': 'en'})
+            self.assertEqual(resp.context['ai_suggestions'], {'summary': 'Quyosh botishi'})
+            # Sozlanmagan til — yangi tahlil boshlanmaydi, standart til ko‘rsatiladi
+            resp = self.client.get(reverse('catalog:detail', args=[self.art.slug]), {'lang': 'zz-abc1'})
+        self.assertContains(resp, 'Quyosh botishi')
+        self.assertContains(resp, 'Language: en<')
+        self.assertNotContains(resp, 'zz-abc1')
+        self.assertFalse(ArtworkAnalysis.objects.filter(lang='zz-abc1').exists())
+
+    @override_settings(OPENAI_API_KEY='test-key', CATALOG_BACKGROUND_TASKS=True, AI_ANALYSIS_DEBOUNCE=0.2,
+                       AI_ANALYSIS_LANGUAGES=['en'])
+    def test_analysis_is_debounced_and_drops_stale_results(self):
+        # E’lon + ikki rasm saqlanishi — bitta tahlil, oxirgi holat bilan
+        with mock.patch('catalog.analysis.generate_analysis') as generate:
+            for _ in range(3):
+                schedule_analysis(self.art.pk)
+            time.sleep(0.6)
+        generate.assert_called_once_with(self.art.pk, 'en')
+
+        def edited_meanwhile(*args, **kwargs):
+            Artwork.objects.filter(pk=self.art.pk).update(title='Tahrirlangan')
+            return {'summary': 'Eski'}
+
+        with mock.patch('catalog.analysis.analyze_content', side_effect=edited_meanwhile):
+            generate_analysis(self.art.pk, 'en')
+        self.assertFalse(ArtworkAnalysis.objects.filter(artwork=self.art).exists())
+
+    @override_settings(OPENAI_API_KEY='test-key', AI_CACHE_NEGATIVE_TTL=60)
+    def test_analyze_content_cache(self):
+        analysis_cache.clear()
+        with mock.patch('catalog.ai_content._request_analysis', return_value={'style': 'Moy bo‘yoq'}) as request:
+            self.assertEqual(analyze_content('Sunset', 'desc', [b'img'], 'en'), {'style': 'Moy bo‘yoq'})
+            analyze_content('Sunset', 'desc', iter([b'img']), 'en')
+            self.assertEqual(request.call_count, 1)
+            analyze_content('Sunset', 'desc', [b'img'], 'uz')
+            analyze_content('Sunset', 'desc', [b'other'], 'en')
+            self.assertEqual(request.call_count, 3)
+        # Xato natija ham qisqa muddat keshlanadi
+        with mock.patch('catalog.ai_content._request_analysis', return_value={}) as request:
+            analyze_content('Outage', '', [], 'en')
+            analyze_content('Outage', '', [], 'en')
+            self.assertEqual(request.call_count, 1)
+
+    def test_anonymous_detail_page_cache(self):
+        cache.clear()
+        url = reverse('catalog:detail', args=[self.art.slug])
+        self.client.get(url, REMOTE_ADDR='10.0.0.1')
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, REMOTE_ADDR='10.0.0.2')
+        self.assertContains(resp, 'Sunset')
+        self.assertEqual(len(view_buffer), 2)  # keshdan berilganda ham ko‘rish yoziladi
+
+        Comment.objects.create(artwork=self.art, user=self.user2, text='Ajoyib asar')
+        self.assertContains(self.client.get(url), 'Ajoyib asar')
+
+    def test_detail_query_budget(self):
+        Rating.objects.create(artwork=self.art, user=self.user2, value=4)
+        Comment.objects.bulk_create([Comment(artwork=self.art, user=self.user, text=f'izoh {i}') for i in range(25)])
+        Artwork.objects.filter(pk=self.art.pk).update(comments_count=25)  # bulk_create signal chaqirmaydi
+        self.client.login(username='bob', password='pass12345')
+        url = reverse('catalog:detail', args=[self.art.slug])
+        # sessiya, foydalanuvchi, e’lon (+ annotatsiyalar), rasmlar, izohlar sahifasi
+        for cpage in ('1', '3'):
+            with self.assertNumQueries(5):
+                resp = self.client.get(url, {'cpage': cpage})
+        self.assertEqual(resp.context['user_rating'], 4)
+        self.assertEqual(resp.context['comments_page'].paginator.num_pages, 3)
+        self.assertEqual(len(resp.context['comments_page']), 5)
+
+    @override_settings(TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='42', TELEGRAM_OUTBOX_BACKGROUND=False,
+                       TELEGRAM_CHAT_MIN_INTERVAL=0)
+    def test_order_goes_through_outbox(self):
+        chat_limiter._next.clear()
+        with mock.patch('catalog.outbox.send_telegram_message') as send:
+            resp = self.client.post(reverse('catalog:detail', args=[self.art.slug]), {'order_submit': '1'})
+            self.assertEqual(resp.status_code, 302)
+            send.assert_not_called()
+        row = TelegramOutbox.objects.get()
+        self.assertIn('Sunset', row.text)
+        self.assertEqual(row.chat_id, '')  # TELEGRAM_CHAT_ID yetkazishda olinadi
+
+        # Chat sozlanmagan — xabar navbatda kutadi, urinish sarflanmaydi
+        with self.settings(TELEGRAM_CHAT_ID=''), mock.patch('catalog.outbox.send_telegram_message') as send:
+            self.assertEqual(deliver_due(), 0)
+        send.assert_not_called()
+
+        due = TelegramOutbox.objects.filter(pk=row.pk)
+        with mock.patch('catalog.outbox.send_telegram_message', return_value=SendResult(ok=False, error='timeout')):
+            self.assertEqual(deliver_due(), 0)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('pending', 1))
+        self.assertGreater(row.next_attempt_at, timezone.now())
+
+        due.update(next_attempt_at=timezone.now())
+        with mock.patch('catalog.outbox.send_telegram_message', return_value=SendResult(ok=True)) as send:
+            self.assertEqual(deliver_due(), 1)
+        send.assert_called_once_with('42', row.text)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('sent', 2))
+
+    def test_http_client_reuses_connections(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _MockHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(pool.clear)
+        url = f'http://127.0.0.1:{server.server_address[1]}/sendMessage'
+
+        self.assertTrue(post_json(url, {'text': 'a'})['ok'])
+        (conn,) = pool._idle[('http', '127.0.0.1', server.server_address[1])]
+        post_json(url, {'text': 'b'})
+        self.assertEqual(pool._idle[('http', '127.0.0.1', server.server_address[1])], [conn])
+        with self.assertRaises(HTTPClientError):
+            post_json(url, {'text': 'c'}, max_bytes=5)
+
+    def test_standin_serves_configured_api_bases(self):
+        config = StandinConfig(retry_after=3)
+        server = StandinServer(config).start()
+        self.addCleanup(server.stop)
+        self.addCleanup(pool.clear)
+        with self.settings(OPENAI_API_KEY='x', OPENAI_API_BASE=server.openai_base, MODERATION_ENABLED=True,
+                           TELEGRAM_BOT_TOKEN='t', TELEGRAM_API_BASE=server.telegram_base):
+            self.assertEqual(moderate_content('Kuzgi bog‘', 'Tinch manzara', [b'img']), (True, ''))
+            ok, reason = moderate_content('Boshqa asar', 'unsafe-demo matn', [])
+            self.assertFalse(ok)
+            self.assertIn('text', reason)
+            self.assertTrue(send_telegram_message('1', 'salom').ok)
+            config.rate_limit_rate = 1.0
+            self.assertEqual(send_telegram_message('1', 'salom'), SendResult(ok=False, retry_after=3.0,
+                                                                             error='Too Many Requests: retry after 3'))
+        self.assertEqual(config.stats['moderations:200'], 2)
+        self.assertEqual(config.stats['chat:200'], 1)
+        self.assertEqual(config.stats['telegram:429'], 1)
+
+    def test_detail_conditional_get(self):
+        self.client.login(username='bob', password='pass12345')
+        url = reverse('catalog:detail', args=[self.art.slug])
+        resp = self.client.get(url)
+        etag = resp['ETag']
+        # Izoh o‘chirilishi yoki reyting o‘zgarishi vaqt ustunini siljitmaydi — faqat ETag
+        self.assertFalse(resp.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)).status_code, 200)
+
+        # sessiya, foydalanuvchi, e’lon — rasmlar, izohlar va shablonsiz
+        with self.assertNumQueries(3):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertEqual(len(view_buffer), 3)
+
+        Comment.objects.create(artwork=self.art, user=self.user, text='Yangi izoh')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(MODERATION_ENABLED=True, MODERATION_DEADLINE=1)
+    def test_moderation_runs_concurrently_under_deadline(self):
+        def slow_text(text, timeout):
+            time.sleep(0.5)
+            return False, 0.0, {}
+
+        def image(img, timeout):
+            time.sleep(0.5 if img == b'ok' else 0.1)
+            return img == b'bad', 0.0, ''
+
+        with mock.patch('catalog.moderation._call_openai_moderation', side_effect=slow_text), \
+                mock.patch('catalog.moderation._call_openai_image_moderation', side_effect=image):
+            start = time.monotonic()
+            self.assertEqual(moderate_content('Yangi', '', [b'ok', b'ok', b'ok'])[0], True)
+            self.assertLess(time.monotonic() - start, 1.0)  # ketma-ket bo‘lsa 2 soniya
+
+            start = time.monotonic()
+            ok, message = moderate_content('Yangi', '', [b'ok', b'bad'])
+            self.assertFalse(ok)
+            self.assertIn('Image', message)
+            self.assertLess(time.monotonic() - start, 0.4)  # birinchi taqiqda to‘xtaydi
+
+        with mock.patch('catalog.moderation._call_openai_moderation', side_effect=lambda t, timeout: time.sleep(3)):
+            start = time.monotonic()
+            self.assertEqual(moderate_content('Boshqa', '', []), (True, ''))
+            self.assertLess(time.monotonic() - start, 1.5)
+
+            # Pool band: rasm tekshiruvi navbatda qolib boshlanmadi — kontent o‘tkazilmaydi
+            busy_pool = ThreadPoolExecutor(max_workers=1)
+            self.addCleanup(busy_pool.shutdown, wait=False)
+            with mock.patch('catalog.moderation._executor', busy_pool), \
+                    mock.patch('catalog.moderation._call_openai_image_moderation') as image_call:
+                self.assertEqual(moderate_content('Uchinchi', '', [b'new']), (False, BUSY_MESSAGE))
+            image_call.assert_not_called()
+
+    def test_duplicate_titles_use_trigram_index(self):
+        Artwork.objects.create(author=self.user2, title='Tog‘dagi kuz manzarasi', price=5, contact='1')
+        for i in range(30):
+            Artwork.objects.create(author=self.user2, title=f'Natyurmort {i}', price=5, contact='1')
+        # SequenceMatcher faqat nomzodlarda: trigrammalar, top-nomzod sarlavhalari
+        with self.assertNumQueries(2):
+            self.assertTrue(check_duplicates('tog‘dagi  kuz manzarasi!')[0])
+        self.assertFalse(check_duplicates('Dengiz portreti')[0])
+        self.assertFalse(check_duplicates('Sunset', exclude_pk=self.art.pk)[0])
+        self.assertTrue(check_duplicates('Sunset')[0])
+
+        self.art.title = 'Quyosh chiqishi'
+        self.art.save()
+        self.assertFalse(check_duplicates('Sunset')[0])
+        # Sarlavha o‘zgarmasa trigrammalar qayta yozilmaydi
+        with mock.patch('catalog.trigrams.index_title') as index_title:
+            self.art.price = 7
+            self.art.save()
+        index_title.assert_not_called()
+
+    @override_settings(MODERATION_ENABLED=True)
+    def test_moderation_verdicts_are_reused(self):
+        text_call = mock.Mock(return_value=(False, 0.01, {}))
+        image_call = mock.Mock(side_effect=lambda img, timeout: (img == b'bad', 0.0, ''))
+        with mock.patch('catalog.moderation._call_openai_moderation', text_call), \
+                mock.patch('catalog.moderation._call_openai_image_moderation', image_call):
+            self.assertTrue(moderate_content('Tog‘', 'manzara', [b'img1', b'img2'])[0])
+            self.assertEqual((text_call.call_count, image_call.call_count), (1, 2))
+            self.assertEqual(ModerationVerdict.objects.count(), 3)
+
+            # Bo‘shliqlari boshqacha matn va o‘sha rasmlar — API chaqirilmaydi
+            self.assertTrue(moderate_content('Tog‘ ', ' manzara', [b'img2', b'img1'])[0])
+            self.assertEqual((text_call.call_count, image_call.call_count), (1, 2))
+
+            self.assertFalse(moderate_content('Tog‘', 'manzara', [b'bad'])[0])
+            self.assertFalse(moderate_content('Tog‘', 'manzara', [b'bad'])[0])
+            self.assertEqual(image_call.call_count, 3)
+
+            with override_settings(MODERATION_THRESHOLD=0.5):
+                moderate_content('Tog‘', 'manzara', [])
+            self.assertEqual(text_call.call_count, 2)
+
+    def test_perceptual_hash_finds_reposted_images(self):
+        from PIL import Image, ImageDraw
+
+        def picture(kind, size=(240, 180), fmt='PNG'):
+            img = Image.new('RGB', size, 'white')
+            draw = ImageDraw.Draw(img)
+            w, h = size
+            if kind == 'circle':
+                draw.ellipse((w // 6, h // 6, w * 5 // 6, h * 5 // 6), fill='navy')
+            else:
+                draw.rectangle((0, 0, w // 2, h), fill='darkred')
+            buf = BytesIO()
+            img.save(buf, fmt)
+            return buf.getvalue()
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        self.assertFalse(check_duplicate_images([picture('circle')]))
+        with self.settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks(execute=True):
+            image = ArtworkImage.objects.create(
+                artwork=self.art, image=SimpleUploadedFile('c.png', picture('circle')))
+        image.refresh_from_db()
+        self.assertEqual(len(image.phash), 16)
+
+        # Yangi xesh mavjud daraxtga qo‘shiladi — jadvallar qayta o‘qilmaydi.
+        # Boshqa o‘lcham va JPEG — o‘sha rasm; boshqa rasm — yo‘q; o‘z e’lonida — hisobga olinmaydi
+        with mock.patch('catalog.imagehash.build_tree', side_effect=AssertionError('full rebuild')):
+            self.assertTrue(check_duplicate_images([picture('circle', (480, 360), 'JPEG')]))
+            self.assertFalse(check_duplicate_images([picture('half')]))
+            self.assertFalse(check_duplicate_images([picture('circle')], exclude_pk=self.art.pk))
+            # Rasm o‘zgarmagan tahrir faylni qayta xeshlamaydi
+            with self.captureOnCommitCallbacks(execute=True), mock.patch('catalog.signals.store_phash') as store:
+                self.art.price = 11
+                self.art.save()
+            store.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertFalse(check_duplicate_images([picture('circle')]))
+
+        # Avlod kaliti keshdan chiqib ketsa — daraxt qayta quriladi
+        cache.set(PHASH_GENERATION_KEY, 1, None)
+        tree = image_tree()
+        cache.delete(PHASH_GENERATION_KEY)
+        self.assertIsNot(image_tree(), tree)
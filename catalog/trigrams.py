@@ -0,0 +1,70 @@
+"""Trigram index over normalized artwork titles for near-duplicate detection.
+
+Each artwork stores the distinct trigrams of its normalized title in
+`ArtworkTitleTrigram` (indexed on `gram`). A lookup collects the artworks
+sharing the most trigrams with the new title through that index, and only
+those candidates (at most MODERATION_DUP_CANDIDATES) are compared with
+`difflib.SequenceMatcher` against MODERATION_DUP_THRESHOLD, as before.
+"""
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Artwork, ArtworkTitleTrigram
+
+
+def normalize_title(title: str) -> str:
+    return ' '.join((title or '').lower().split())
+
+
+def title_trigrams(title: str) -> set:
+    padded = f'  {normalize_title(title)} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def index_title(artwork_id: int, title: str) -> None:
+    with transaction.atomic():
+        ArtworkTitleTrigram.objects.filter(artwork_id=artwork_id).delete()
+        ArtworkTitleTrigram.objects.bulk_create(
+            [ArtworkTitleTrigram(artwork_id=artwork_id, gram=g) for g in sorted(title_trigrams(title))]
+        )
+
+
+def rebuild_title_index(queryset=None) -> int:
+    qs = Artwork.objects.all() if queryset is None else queryset
+    n = 0
+    with transaction.atomic():
+        ArtworkTitleTrigram.objects.filter(artwork__in=qs).delete()
+        rows = []
+        for artwork_id, title in qs.values_list('pk', 'title').iterator():
+            rows.extend(ArtworkTitleTrigram(artwork_id=artwork_id, gram=g) for g in title_trigrams(title))
+            n += 1
+            if len(rows) >= 5000:
+                ArtworkTitleTrigram.objects.bulk_create(rows)
+                rows = []
+        ArtworkTitleTrigram.objects.bulk_create(rows)
+    return n
+
+
+def near_duplicate(title: str, exclude_pk: int | None = None):
+    """(is_duplicate, best_ratio) using the trigram index to pick candidates."""
+    norm = normalize_title(title)
+    grams = title_trigrams(title)
+    candidates = ArtworkTitleTrigram.objects.filter(gram__in=grams)
+    if exclude_pk is not None:
+        candidates = candidates.exclude(artwork_id=exclude_pk)
+    limit = getattr(settings, 'MODERATION_DUP_CANDIDATES', 50)
+    top_ids = [
+        row['artwork_id']
+        for row in candidates.values('artwork_id').annotate(shared=Count('id')).order_by('-shared')[:limit]
+    ]
+    best = 0.0
+    for other in Artwork.objects.filter(pk__in=top_ids).values_list('title', flat=True):
+        best = max(best, SequenceMatcher(None, norm, normalize_title(other)).ratio())
+        if best >= settings.MODERATION_DUP_THRESHOLD:
+            return True, best
+    return False, best
@@ -5,6 +5,7 @@ app_name = 'catalog'
 
 urlpatterns = [
     path('', views.home_view, name='home'),
+    path('api/artworks/', views.home_json, name='home_json'),
     path('art/create/', views.art_create, name='create'),
     path('art/<slug:slug>/edit/', views.art_update, name='update'),
     path('art/<slug:slug>/delete/', views.art_delete, name='delete'),
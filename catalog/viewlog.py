@@ -0,0 +1,189 @@
+"""Buffered ArtworkView logging.
+
+`art_detail` only calls `record_view`, which appends to an in-process
+buffer; it never touches the database. A background thread flushes the
+buffer every CATALOG_VIEW_BUFFER_INTERVAL seconds, or sooner once
+CATALOG_VIEW_BUFFER_SIZE views are waiting; starting that thread also
+registers a flush at interpreter exit. A flush deduplicates the batch,
+filters out viewers already stored with one query, `bulk_create`s the rest
+and bumps `Artwork.views_count` once per artwork. Every view also feeds the
+per-artwork HyperLogLog sketches in `catalog.sketches`. Repeat anonymous
+views are dropped before buffering by the Bloom filter in `catalog.bloom`.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counters, sketches
+from .bloom import anon_view_filter, anon_view_key
+from .models import Artwork, ArtworkView
+
+logger = logging.getLogger(__name__)
+
+
+class PendingView(NamedTuple):
+    artwork_id: int
+    user_id: int | None
+    ip: str
+    ts: float
+
+    @property
+    def viewer_key(self):
+        # Foydalanuvchi bo‘yicha noyob; anonim — IP bo‘yicha
+        if self.user_id is not None:
+            return (self.artwork_id, self.user_id, None)
+        return (self.artwork_id, None, self.ip)
+
+
+class ViewBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: list[PendingView] = []
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._flush_at_exit = False
+
+    @property
+    def max_size(self) -> int:
+        return getattr(settings, 'CATALOG_VIEW_BUFFER_SIZE', 200)
+
+    @property
+    def interval(self) -> float:
+        return getattr(settings, 'CATALOG_VIEW_BUFFER_INTERVAL', 5.0)
+
+    def record(self, artwork_id: int, user_id: int | None, ip: str, ts: float | None = None) -> None:
+        view = PendingView(artwork_id, user_id, ip or '', ts or time.time())
+        with self._lock:
+            self._pending.append(view)
+            full = len(self._pending) >= self.max_size
+        if getattr(settings, 'CATALOG_VIEW_BUFFER_BACKGROUND', True):
+            self._ensure_thread()
+            if full:
+                self._wake.set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def clear(self) -> None:
+        """Drop buffered views without persisting them."""
+        with self._lock:
+            self._pending = []
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='artwork-view-flusher', daemon=True)
+                self._thread.start()
+                # Faqat fon oqimi ishlaganda: testlar (BACKGROUND=False) chiqishda bazaga yozmaydi
+                if not self._flush_at_exit:
+                    self._flush_at_exit = True
+                    atexit.register(self._flush_on_exit)
+
+    def _flush_on_exit(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                logger.exception("ArtworkView flush failed: %s", exc)
+            finally:
+                connections.close_all()
+
+    def flush(self) -> int:
+        """Persist everything buffered so far. Returns the number of new ArtworkView rows."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            created = self._persist(batch)
+        try:
+            anon_view_filter.checkpoint()
+        except Exception as exc:
+            logger.exception("Bloom filter checkpoint failed: %s", exc)
+        return created
+
+    def _persist(self, batch: list[PendingView]) -> int:
+        unique = {}
+        for view in batch:
+            unique.setdefault(view.viewer_key, view)
+
+        # Bufer kutayotganda o‘chirilgan e’lonlar tashlab yuboriladi
+        artwork_ids = set(
+            Artwork.objects.filter(pk__in={v.artwork_id for v in unique.values()}).values_list('pk', flat=True)
+        )
+        unique = {k: v for k, v in unique.items() if v.artwork_id in artwork_ids}
+        user_ids = {v.user_id for v in unique.values() if v.user_id is not None}
+        ips = {v.ip for v in unique.values() if v.user_id is None}
+        existing = set()
+        if unique:
+            cond = Q(user_id__in=user_ids) | Q(user__isnull=True, ip_address__in=ips)
+            for artwork_id, user_id, ip in (
+                ArtworkView.objects.filter(cond, artwork_id__in=artwork_ids)
+                .values_list('artwork_id', 'user_id', 'ip_address')
+            ):
+                existing.add((artwork_id, user_id, None) if user_id is not None else (artwork_id, None, ip))
+
+        self._update_sketches(batch, artwork_ids)
+
+        new = [v for key, v in unique.items() if key not in existing]
+        if not new:
+            return 0
+        with transaction.atomic():
+            ArtworkView.objects.bulk_create(
+                [ArtworkView(artwork_id=v.artwork_id, user_id=v.user_id, ip_address=v.ip) for v in new],
+                batch_size=500,
+            )
+            # bulk_create post_save signalini chaqirmaydi — hisoblagichlar shu yerda
+            for artwork_id, n in Counter(v.artwork_id for v in new).items():
+                counters.views_added(artwork_id, n)
+        return len(new)
+
+    def _update_sketches(self, batch: list[PendingView], artwork_ids: set) -> None:
+        """Feed every buffered view (duplicates included) into the HyperLogLog sketches."""
+        per_artwork = defaultdict(lambda: defaultdict(list))
+        for view in batch:
+            if view.artwork_id in artwork_ids:
+                day = timezone.localtime(datetime.fromtimestamp(view.ts, tz=dt_timezone.utc)).date()
+                per_artwork[view.artwork_id][day].append(sketches.viewer_id(view.user_id, view.ip))
+        for artwork_id, by_day in per_artwork.items():
+            try:
+                sketches.add_viewers(artwork_id, by_day)
+            except Exception as exc:
+                logger.exception("View sketch update failed for artwork %s: %s", artwork_id, exc)
+
+
+view_buffer = ViewBuffer()
+
+
+def record_view(artwork_id: int, user_id: int | None, ip: str) -> None:
+    # Anonim qayta ko‘rish — Bloom filtri "ko‘rilgan" desa bazaga umuman bormaydi
+    if user_id is None and anon_view_filter.seen_or_add(anon_view_key(artwork_id, ip or '')):
+        return
+    view_buffer.record(artwork_id, user_id, ip)
+
+
+def flush_views() -> int:
+    return view_buffer.flush()
@@ -2,23 +2,36 @@ from __future__ import annotations
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Avg, Count
 from django.conf import settings
+from django.db.models import OuterRef, Subquery, prefetch_related_objects
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_GET
 from django.urls import reverse
-import urllib.request
 import urllib.parse
+import hashlib
 import json
 import logging
 
-from .models import Artwork, Category, Rating, Comment, ArtworkView
+from .models import Artwork, Category, Rating, Comment
 from .forms import ArtworkForm, ArtworkImageFormSet, RatingForm, CommentForm
 from .moderation import moderate_content
 from .ai_content import analyze_content
+from .analysis import analysis_annotations, analysis_lang, annotated_analysis
+from .listing import listing_order_by, listing_ordering, listing_queryset, parse_listing_params
+from .cache import artwork_slug_key, artwork_version, catalog_generation, detail_page_key, filter_signature, listing_page_key
+from .facets import listing_facets
+from .pagination import CachedCountPaginator, KeysetPaginator, KnownCountPaginator
+from .outbox import enqueue_telegram_message
+from .viewlog import record_view
 
 
 logger = logging.getLogger(__name__)
 
+LISTING_PAGE_SIZE = 12
+
 
 # 🧠 IP olish yordamchi funksiyasi
 def get_client_ip(request):
@@ -28,147 +41,180 @@ def get_client_ip(request):
     return request.META.get('REMOTE_ADDR', '')
 
 
-def send_order_to_telegram(message: str) -> bool:
-    """Minimal Telegram sendMessage helper without external deps."""
-    token = getattr(settings, 'TELEGRAM_BOT_TOKEN', '')
-    chat_id = getattr(settings, 'TELEGRAM_CHAT_ID', '')
-    if not token or not chat_id:
-        logger.warning("Telegram config missing: TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID")
-        return False
+def _listing_page(request, filters):
+    """Joriy sahifa: ?cursor=... bo‘lsa keyset (OFFSET va COUNT siz), aks holda ?page=N."""
+    qs = listing_queryset(filters)
+    if 'cursor' in request.GET:
+        paginator = KeysetPaginator(qs, listing_ordering(filters), LISTING_PAGE_SIZE)
+        return paginator.get_page(request.GET.get('cursor')), True
+    paginator = CachedCountPaginator(qs.order_by(*listing_order_by(filters)), LISTING_PAGE_SIZE, filter_signature(filters))
+    return paginator.get_page(request.GET.get('page')), False
 
-    try:
-        url = f'https://api.telegram.org/bot{token}/sendMessage'
-        payload = json.dumps({'chat_id': chat_id, 'text': message})
-        req = urllib.request.Request(
-            url,
-            data=payload.encode(),
-            headers={'Content-Type': 'application/json'},
-        )
-        with urllib.request.urlopen(req, timeout=6) as resp:
-            ok = 200 <= getattr(resp, 'status', 500) < 300
-            if not ok:
-                logger.error("Telegram send failed with status %s", getattr(resp, 'status', 'unknown'))
-            return ok
-    except Exception as exc:
-        logger.exception("Telegram order notification failed: %s", exc)
+
+def _is_cacheable_anonymous(request) -> bool:
+    """Anonim GET, kutilayotgan flash xabarlarsiz — umumiy keshdan berish mumkin."""
+    if request.method != 'GET' or request.user.is_authenticated:
         return False
+    return not len(messages.get_messages(request))
+
+
+def _detail_etag(request, art, lang, cpage):
+    """ETag: holat + foydalanuvchi + so‘rov.
+
+    Last-Modified yuborilmaydi: izoh o‘chirilishi, reyting qiymati yoki ko‘rishlar soni
+    o‘zgarganda hech bir vaqt ustuni oldinga siljimaydi va If-Modified-Since eskirgan 304 berardi.
+    """
+    # Sessiya kaliti login paytida CSRF siri bilan birga almashadi — eski forma tokenli sahifa 304 bo‘lmaydi
+    raw = json.dumps([
+        art.pk, art.updated.isoformat(), art.avg_rating, art.rating_count, art.comments_count, art.views_count,
+        artwork_version(art.pk), request.user.pk, request.session.session_key, lang, cpage or '',
+    ])
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def _with_etag(response, etag):
+    response.headers['ETag'] = etag
+    return response
 
 
 # 🏠 Bosh sahifa (TO‘LIQ TUZATILGAN)
 def home_view(request):
-    qs = Artwork.objects.select_related('author', 'category') \
-        .prefetch_related('images') \
-        .annotate(
-            avg_rating=Avg('ratings__value'),
-            views_count=Count('views'),
-        )
-
-    # Filtrlash parametrlari
-    title = request.GET.get('title', '').strip()
-    category = request.GET.get('category', '').strip()
-    min_price = request.GET.get('min_price', '').strip()
-    max_price = request.GET.get('max_price', '').strip()
-    rating_gte = request.GET.get('rating_gte', '').strip()
-    order_by = request.GET.get('order_by', '').strip()
-
-    # Filter amallari
-    if title:
-        qs = qs.filter(title__icontains=title)
-    if category:
-        qs = qs.filter(category__slug=category)
-    if min_price:
-        qs = qs.filter(price__gte=min_price)
-    if max_price:
-        qs = qs.filter(price__lte=max_price)
-    if rating_gte:
-        qs = qs.filter(avg_rating__gte=rating_gte)
-
-    # Tartiblash
-    allowed_order = {
-        'price': 'price',
-        '-price': '-price',
-        'rating': 'avg_rating',
-        '-rating': '-avg_rating',
-        'date': '-created',
-        '-date': 'created',
-    }
-    qs = qs.order_by(allowed_order.get(order_by, '-created'))
+    filters = parse_listing_params(request.GET)
+
+    # Anonim sahifa keshi (katalog avlodi o‘zgarganda o‘z-o‘zidan eskiradi)
+    cache_key = None
+    if _is_cacheable_anonymous(request):
+        cache_key = listing_page_key(request.GET.lists())
+        content = cache.get(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+
+    page_obj, cursor_mode = _listing_page(request, filters)
 
-    # PAGINATION — HAR DOIM SERVER-SIDE
-    paginator = Paginator(qs, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Sidebar: kategoriya va narx oraliqlari bo‘yicha sonlar (keshlangan)
+    facets = listing_facets(filters)
+    categories = list(Category.objects.all())
+    for c in categories:
+        c.facet_count = facets['categories'].get(c.slug, 0)
 
     ctx = {
         'page_obj': page_obj,
-        'categories': Category.objects.all(),
-        'filters': {
-            'title': title,
-            'category': category,
-            'min_price': min_price,
-            'max_price': max_price,
-            'rating_gte': rating_gte,
-            'order_by': order_by,
-        },
+        'cursor_mode': cursor_mode,
+        'categories': categories,
+        'price_facets': facets['prices'],
+        'filters': filters,
+        'card_cache_timeout': settings.CATALOG_CARD_CACHE_TIMEOUT,
+    }
+
+    response = render(request, 'catalog/home.html', ctx)
+    if cache_key:
+        cache.set(cache_key, response.content, settings.CATALOG_PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def _listing_etag(request, *args, **kwargs):
+    """Katalog avlodi + so‘rov parametrlari; avlod o‘zgarmasa javob ham o‘zgarmaydi."""
+    params = sorted(request.GET.lists())
+    raw = json.dumps([catalog_generation(), params])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _page_query(request, **updates) -> str:
+    query = request.GET.copy()
+    for key, value in updates.items():
+        if value is None or value == '':
+            query.pop(key, None)
+        else:
+            query[key] = str(value)
+    return f"?{query.urlencode()}"
+
+
+def _card_json(art) -> dict:
+    return {
+        'id': art.pk,
+        'slug': art.slug,
+        'title': art.title,
+        'price': str(art.price),
+        'image': art.first_image_url,
+        'url': reverse('catalog:detail', args=[art.slug]),
+        'avg_rating': round(art.avg_rating, 2),
+        # views_count yo‘q: u katalog avlodini o‘zgartirmaydi, kuchli ETag esa faqat avlodga tayanadi
     }
 
-    return render(request, 'catalog/home.html', ctx)
+
+# 📦 JSON ro‘yxat (cheksiz aylantirish uchun)
+@require_GET
+@condition(etag_func=_listing_etag)
+def home_json(request):
+    filters = parse_listing_params(request.GET)
+    page_obj, cursor_mode = _listing_page(request, filters)
+
+    next_q = prev_q = None
+    count = None
+    if cursor_mode:
+        if page_obj.has_next():
+            next_q = _page_query(request, cursor=page_obj.next_cursor, page=None)
+        if page_obj.has_previous():
+            prev_q = _page_query(request, cursor=page_obj.previous_cursor, page=None)
+    else:
+        count = page_obj.paginator.display_count
+        if page_obj.has_next():
+            next_q = _page_query(request, page=page_obj.next_page_number())
+        if page_obj.has_previous():
+            prev_q = _page_query(request, page=page_obj.previous_page_number())
+
+    return JsonResponse({
+        'results': [_card_json(art) for art in page_obj],
+        'next': next_q,
+        'previous': prev_q,
+        'count': count,
+    })
 
 
 # 🎨 Detal sahifa
 def art_detail(request, slug):
-    art = get_object_or_404(
-        Artwork.objects.select_related('author', 'category')
-        .prefetch_related('images', 'comments__user'),
-        slug=slug
-    )
-
-    is_owner = request.user.is_authenticated and request.user == art.author
-
-    # Ko‘rish logi
-    ip = get_client_ip(request)
+    lang = analysis_lang(request.GET.get('lang') or getattr(request, 'LANGUAGE_CODE', 'en') or 'en')
+    cpage = request.GET.get('cpage')
+
+    # Anonim javob keshi: slug → id xaritasi + e’lon versiyasi (catalog.cache);
+    # keshdan berilganda ham ko‘rish logi yoziladi
+    cacheable = _is_cacheable_anonymous(request)
+    if cacheable:
+        artwork_id = cache.get(artwork_slug_key(slug))
+        if artwork_id is not None:
+            cached = cache.get(detail_page_key(artwork_id, cpage, lang))
+            if cached is not None:
+                record_view(artwork_id, None, get_client_ip(request))
+                etag = cached['etag']
+                response = get_conditional_response(request, etag=etag)
+                return _with_etag(response or HttpResponse(cached['content']), etag)
+
+    # Statistika ustunlarda; foydalanuvchi reytingi va AI tahlili — subquery annotatsiyalar
+    detail_qs = Artwork.objects.select_related('author', 'category').annotate(**analysis_annotations(lang))
     if request.user.is_authenticated:
-        if not ArtworkView.objects.filter(artwork=art, user=request.user).exists():
-            ArtworkView.objects.create(artwork=art, user=request.user, ip_address=ip)
-    else:
-        if not ArtworkView.objects.filter(artwork=art, user__isnull=True, ip_address=ip).exists():
-            ArtworkView.objects.create(artwork=art, user=None, ip_address=ip)
+        own_rating = Rating.objects.filter(artwork=OuterRef('pk'), user=request.user).values('value')[:1]
+        detail_qs = detail_qs.annotate(user_rating=Subquery(own_rating))
+    art = get_object_or_404(detail_qs, slug=slug)
+    cache_key = detail_page_key(art.pk, cpage, lang) if cacheable else None
+
+    # Ko‘rish logi — buferga; bazaga fon oqimi partiyalab yozadi (catalog.viewlog)
+    record_view(art.pk, request.user.pk if request.user.is_authenticated else None, get_client_ip(request))
+
+    # Shartli GET: o‘zgarmagan bo‘lsa 304 — rasmlar, izohlar va shablonsiz
+    etag = _detail_etag(request, art, lang, cpage)
+    if request.method == 'GET' and not len(messages.get_messages(request)):
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return _with_etag(response, etag)
+
+    prefetch_related_objects([art], 'images')
+    is_owner = request.user.is_authenticated and request.user == art.author
 
-    avg_rating = art.ratings.aggregate(r=Avg('value'))['r'] or 0
-    views_count = art.views.count()
-
-    ai_suggestions = {}
-    lang = request.GET.get('lang') or getattr(request, 'LANGUAGE_CODE', 'en') or 'en'
-    if settings.OPENAI_API_KEY:
-        images_bytes = []
-
-        def _read_file(file_field):
-            try:
-                with file_field.open('rb') as fp:
-                    return fp.read()
-            except Exception:
-                return None
-
-        if art.image:
-            data = _read_file(art.image)
-            if data:
-                images_bytes.append(data)
-
-        for img in art.images.all()[:2]:
-            if img.image:
-                data = _read_file(img.image)
-                if data:
-                    images_bytes.append(data)
+    avg_rating = art.avg_rating
+    views_count = art.views_count
 
-        try:
-            ai_suggestions = analyze_content(
-                art.title or '',
-                art.description or '',
-                images_bytes,
-                target_lang=lang,
-            ) or {}
-        except Exception:
-            ai_suggestions = {}
+    # AI tahlili — oldindan hisoblangan (catalog.analysis), OpenAI bu yerda chaqirilmaydi
+    ai_suggestions = annotated_analysis(art, lang)
 
     # POST: Reyting & Izoh
     if request.method == 'POST':
@@ -193,7 +239,8 @@ def art_detail(request, slug):
                 f"Telefon: {seller_phone}\n"
             )
 
-            send_order_to_telegram(msg)
+            # Faqat navbatga yoziladi; yuborish fon oqimida (catalog.outbox)
+            enqueue_telegram_message(msg)
             return redirect('catalog:detail', slug=slug)
 
         # ⭐ Reyting
@@ -229,16 +276,13 @@ def art_detail(request, slug):
                 return redirect('catalog:detail', slug=slug)
 
     rating_form = RatingForm()
-    user_rating = 0
-    if request.user.is_authenticated:
-        existing_rating = Rating.objects.filter(artwork=art, user=request.user).first()
-        if existing_rating:
-            user_rating = existing_rating.value
+    user_rating = getattr(art, 'user_rating', None) or 0
     comment_form = CommentForm()
 
+    # Umumiy son comments_count ustunidan — COUNT(*) so‘rovi yo‘q
     comments_qs = art.comments.select_related('user').order_by('-created')
-    paginator = Paginator(comments_qs, 10)
-    comments_page = paginator.get_page(request.GET.get('cpage'))
+    paginator = KnownCountPaginator(comments_qs, 10, art.comments_count)
+    comments_page = paginator.get_page(cpage)
 
     ctx = {
         'art': art,
@@ -251,8 +295,13 @@ def art_detail(request, slug):
         'comment_form': comment_form,
         'comments_page': comments_page,
         'ai_suggestions': ai_suggestions,
+        'ai_lang': lang,
     }
-    return render(request, 'catalog/detail.html', ctx)
+    response = _with_etag(render(request, 'catalog/detail.html', ctx), etag)
+    if cache_key:
+        cached = {'content': response.content, 'etag': etag}
+        cache.set_many({artwork_slug_key(slug): art.pk, cache_key: cached}, settings.CATALOG_DETAIL_CACHE_TIMEOUT)
+    return response
 
 
 # ❌ E’lon o‘chirish
@@ -329,7 +378,6 @@ def art_create(request):
                 form.cleaned_data.get('title', ''),
                 form.cleaned_data.get('description', ''),
                 images_bytes,
-                Artwork.objects.values_list('title', flat=True),
             )
             if not ok:
                 messages.error(request, reason)
@@ -387,7 +435,7 @@ def art_update(request, slug):
                 form.cleaned_data.get('title', ''),
                 form.cleaned_data.get('description', ''),
                 images_bytes,
-                Artwork.objects.exclude(pk=art.pk).values_list('title', flat=True),
+                exclude_pk=art.pk,
             )
             if not ok:
                 messages.error(request, reason)
@@ -1,4 +1,50 @@
-// Client-side pagination for cards on Home
+// Pagination for cards on Home
+
+// Card markup mirrors the server-rendered cards in catalog/home.html
+const priceFormat = new Intl.NumberFormat('en-US', { maximumFractionDigits: 0 });
+
+function buildCard(art) {
+  const col = document.createElement('div');
+  col.className = 'col-6 col-sm-6 col-md-4 col-lg-3 card-item';
+  const card = document.createElement('div');
+  card.className = 'product-card h-100 shadow-sm uzbek-product-card';
+
+  if (art.image) {
+    const img = document.createElement('img');
+    img.src = art.image;
+    img.className = 'card-img-top cover';
+    img.alt = art.title;
+    img.loading = 'lazy';
+    card.appendChild(img);
+  } else {
+    const ph = document.createElement('div');
+    ph.className = 'placeholder-bg uzbek-placeholder';
+    ph.innerHTML = '<i class="bi bi-image me-2"></i>ARTAR';
+    card.appendChild(ph);
+  }
+
+  const body = document.createElement('div');
+  body.className = 'card-body d-flex flex-column p-3';
+  const title = document.createElement('h5');
+  title.className = 'card-title mb-1 text-truncate uzbek-title';
+  title.title = art.title;
+  title.textContent = art.title;
+  const price = document.createElement('div');
+  price.className = 'mb-3 price uzbek-price';
+  price.append('Narx: ');
+  const strong = document.createElement('strong');
+  strong.textContent = priceFormat.format(parseFloat(art.price));
+  price.append(strong, " so'm");
+  const link = document.createElement('a');
+  link.href = art.url;
+  link.className = 'btn btn-gradient view-btn mt-auto';
+  link.innerHTML = '<i class="bi bi-eye me-2"></i> Ko\'rish';
+  body.append(title, price, link);
+  card.appendChild(body);
+  col.appendChild(card);
+  return col;
+}
+
 document.addEventListener('DOMContentLoaded', () => {
   const grid = document.getElementById('cardsGrid');
   if (!grid) return;
@@ -9,6 +55,43 @@ document.addEventListener('DOMContentLoaded', () => {
   const pageSizeEl = document.getElementById('pageSize');
   const pageSize = pageSizeEl ? parseInt(pageSizeEl.value, 10) || 12 : 12;
 
+  // Server-side pages (?page=N or keyset ?cursor=TOKEN): buttons follow the
+  // links rendered by the server via the qurl tag. With a JSON endpoint,
+  // "next" appends the following page in place (infinite scroll).
+  if (grid.dataset.serverPaging) {
+    const prevUrl = grid.dataset.prevUrl || '';
+    const jsonUrl = grid.dataset.jsonUrl || '';
+    let nextUrl = grid.dataset.nextUrl || '';
+    if (prev) {
+      prev.disabled = !prevUrl;
+      prev.addEventListener('click', () => { if (prevUrl) window.location.href = prevUrl; });
+    }
+    if (next) {
+      next.disabled = !nextUrl;
+      next.addEventListener('click', async () => {
+        if (!nextUrl) return;
+        if (!jsonUrl) {
+          window.location.href = nextUrl;
+          return;
+        }
+        next.disabled = true;
+        try {
+          const resp = await fetch(jsonUrl + nextUrl, { headers: { Accept: 'application/json' } });
+          if (!resp.ok) throw new Error(resp.status);
+          const data = await resp.json();
+          data.results.forEach((art) => grid.appendChild(buildCard(art)));
+          nextUrl = data.next || '';
+        } catch (e) {
+          window.location.href = nextUrl;
+          return;
+        }
+        next.disabled = !nextUrl;
+      });
+    }
+    if (indicator) indicator.textContent = grid.dataset.pageLabel || '';
+    return;
+  }
+
   if (!items.length) {
     if (prev) prev.style.display = 'none';
     if (next) next.style.display = 'none';
@@ -45,4 +128,3 @@ document.addEventListener('DOMContentLoaded', () => {
 
   show(page);
 });
-